@@ -0,0 +1,201 @@
+import math
+import random
+from collections import deque
+import numpy as np
+from food import Food
+from grid import OccupancyGrid
+from neural_network import PopulationNetwork
+from snake import MAX_STEPS_WITHOUT_FOOD, compute_fitness
+from sensors import DIRECTIONS, get_sensor_tables
+from constants import *
+
+# Số ô bàn cờ mặc định cho mỗi con rắn khi không chỉ định kích thước đấu trường
+CELLS_PER_SNAKE = 40
+
+
+def arena_size(num_snakes):
+    """Kích thước (width, height) mặc định: ít nhất bằng bàn cờ thường, tỉ lệ như bàn cờ thường."""
+    cells = max(GRID_WIDTH * GRID_HEIGHT, num_snakes * CELLS_PER_SNAKE)
+    height = max(GRID_HEIGHT, math.ceil(math.sqrt(cells * GRID_HEIGHT / GRID_WIDTH)))
+    width = max(GRID_WIDTH, math.ceil(cells / height))
+    return width, height
+
+
+def run_arena(snakes, seed=None, brains=None, width=None, height=None, num_food=None,
+              max_steps_without_food=MAX_STEPS_WITHOUT_FOOD, kill_bonus=0):
+    """Cho nhiều con rắn chơi cùng lúc trên một bàn cờ chung và trả về (fitness, score, steps) của từng con.
+
+    Mọi con rắn dùng chung một lưới chiếm chỗ (OccupancyGrid), nên cảm biến "nguy hiểm"
+    thấy cả thân rắn khác, và tranh nhau `num_food` mồi (mặc định một mồi cho hai con).
+    Mỗi tick mọi con còn sống cùng đi một bước:
+      - cảm biến tính bằng NumPy như batch_game, mồi được nhìn là mồi gần nhất (Manhattan);
+      - một phép matmul theo lô (PopulationNetwork) cho quyết định của mọi con;
+      - va chạm xét theo bàn cờ đầu tick: đâm tường, đâm thân (của mình hoặc con khác,
+        kể cả ô đuôi sắp rời đi) thì chết; hai đầu cùng lao vào một ô thì cả hai chết;
+      - rắn chết được dọn khỏi bàn cờ; con có thân bị đâm vào được tính một lần hạ gục
+        (snake.kills); fitness cạnh tranh = fitness thường + kill_bonus * số lần hạ gục.
+    Kết quả được ghi lại vào các đối tượng Snake (score, steps_taken, fitness, kills...).
+
+    Với một con rắn, một mồi và bàn cờ mặc định, kết quả giống hệt run_simulation(snake,
+    seed=seed) (đấu trường không tua nhanh vòng lặp nhưng số bước và fitness vẫn như vậy).
+    """
+    n = len(snakes)
+    if n == 0:
+        return []
+    if width is None or height is None:
+        width, height = arena_size(n)
+    if num_food is None:
+        num_food = max(1, n // 2)
+    num_cells = width * height
+    if n + num_food > num_cells:
+        raise ValueError(f"An arena of {width}x{height} cells cannot hold {n} snakes and {num_food} food")
+    tables = get_sensor_tables(width, height)
+    neighbours = tables.neighbours_array
+    wall_inputs = tables.wall_inputs_array
+    food_flags = tables.food_flags_array
+    cell_x, cell_y = tables.cell_x, tables.cell_y
+
+    # --- Khởi tạo: cùng thứ tự rút số ngẫu nhiên như start_episode khi chỉ có một con ---
+    rng = random.Random(seed) if seed is not None else random.Random()
+    grid = OccupancyGrid(width, height)
+    occupied = np.frombuffer(grid.cells, dtype=np.uint8) # View trực tiếp vào lưới, luôn cập nhật
+    owner = np.full(num_cells, -1, dtype=np.int64) # Con rắn đang chiếm mỗi ô
+    bodies = []
+    dir_idx = np.empty(n, dtype=np.int64)
+    for i, snake in enumerate(snakes):
+        snake.direction = rng.choice([UP, DOWN, LEFT, RIGHT])
+        dir_idx[i] = DIRECTIONS.index(snake.direction)
+        # Con đầu tiên xuất phát ở giữa bàn cờ như một lượt chơi thường, các con khác ở ô trống ngẫu nhiên
+        cell = (height // 2) * width + width // 2 if i == 0 else grid.free_cells[rng.randrange(grid.free_count)]
+        grid.add((cell % width, cell // width))
+        owner[cell] = i
+        bodies.append(deque([cell]))
+    head_cell = np.array([body[0] for body in bodies], dtype=np.int64)
+
+    foods = [Food(rng=rng) for _ in range(num_food)]
+    food_cell = np.full(num_food, -1, dtype=np.int64)
+    food_at = np.full(num_cells, -1, dtype=np.int64) # Mồi đang nằm ở mỗi ô
+    for f in range(num_food):
+        _place_food(f, foods, food_cell, food_at, grid)
+
+    alive = np.ones(n, dtype=bool)
+    grow = np.zeros(n, dtype=bool)
+    score = np.zeros(n, dtype=np.int64)
+    steps_taken = np.zeros(n, dtype=np.int64)
+    steps_since_food = np.zeros(n, dtype=np.int64)
+    kills = np.zeros(n, dtype=np.int64)
+
+    if brains is None:
+        brains = PopulationNetwork.from_networks([snake.brain for snake in snakes])
+
+    while alive.any():
+        a = np.flatnonzero(alive)
+        steps_taken[a] += 1
+        steps_since_food[a] += 1
+
+        # --- Cảm biến (như Snake.get_inputs với lưới chung của bàn cờ) ---
+        cell, d = head_cell[a], dir_idx[a]
+        dir_l, dir_s, dir_r = (d - 1) % 4, d, (d + 1) % 4
+
+        def is_danger(dd):
+            nb = neighbours[cell, dd]
+            return (nb < 0) | (occupied[np.maximum(nb, 0)] != 0)
+
+        # Mồi gần nhất của mỗi con (khoảng cách Manhattan, hoà thì lấy mồi có chỉ số nhỏ hơn)
+        hx, hy = cell_x[cell], cell_y[cell]
+        fx, fy = cell_x[food_cell], cell_y[food_cell]
+        nearest = np.argmin(np.abs(fx[None, :] - hx[:, None]) + np.abs(fy[None, :] - hy[:, None]), axis=1)
+        sign_x = np.sign(fx[nearest] - hx) + 1
+        sign_y = np.sign(fy[nearest] - hy) + 1
+        inputs = np.empty((len(a), INPUT_NODES))
+        inputs[:, 0] = is_danger(dir_s)
+        inputs[:, 1] = is_danger(dir_l)
+        inputs[:, 2] = is_danger(dir_r)
+        inputs[:, 3:6] = food_flags[d, sign_x, sign_y]
+        inputs[:, 6] = wall_inputs[cell, dir_s]
+        inputs[:, 7] = wall_inputs[cell, dir_l]
+
+        # --- Quyết định của mọi con rắn trong một lần ---
+        decision = brains.decide(inputs, a) # 0=trái, 1=thẳng, 2=phải
+        d = (d + decision - 1) % 4
+        dir_idx[a] = d
+
+        # --- Va chạm, xét theo bàn cờ đầu tick ---
+        new_cell = neighbours[cell, d]
+        hit_wall = new_cell < 0
+        target = np.maximum(new_cell, 0)
+        hit_body = ~hit_wall & (occupied[target] != 0)
+        moving = ~hit_wall & ~hit_body
+        # Hai đầu lao vào cùng một ô: cả hai chết
+        counts = np.bincount(new_cell[moving], minlength=num_cells)
+        head_on = moving & (counts[target] > 1)
+        moving &= ~head_on
+
+        # Hạ gục: đâm vào thân con khác thì con đó được tính điểm
+        victim_owner = owner[target[hit_body]]
+        credited = victim_owner[victim_owner != a[hit_body]]
+        np.add.at(kills, credited, 1)
+
+        dead = list(a[~moving])
+        m, new_cell = a[moving], new_cell[moving]
+        head_cell[m] = new_cell
+        eaten = food_at[new_cell]
+        ate = eaten >= 0
+        score[m[ate]] += 1
+        steps_since_food[m[ate]] = 0
+
+        # --- Di chuyển trên lưới chung (từng con, mỗi con vài phép O(1)) ---
+        for i, c, grows in zip(m.tolist(), new_cell.tolist(), (ate | grow[m]).tolist()):
+            body = bodies[i]
+            body.appendleft(c)
+            grid.add((c % width, c // width))
+            owner[c] = i
+            if not grows:
+                tail = body.pop()
+                grid.remove((tail % width, tail // width))
+                owner[tail] = -1
+        # Giống Snake.step: ăn thì lớn ở bước này và bước sau
+        grow[m] = ate
+
+        starved = m[steps_since_food[m] > max_steps_without_food]
+        dead.extend(starved.tolist())
+        alive[dead] = False
+        # Dọn thân rắn chết khỏi bàn cờ
+        for i in dead:
+            for c in bodies[i]:
+                if owner[c] == i:
+                    grid.remove((c % width, c // width))
+                    owner[c] = -1
+
+        # Mồi bị ăn sinh lại ở ô trống (sau khi mọi con đã di chuyển)
+        for f in eaten[ate].tolist():
+            _place_food(f, foods, food_cell, food_at, grid)
+
+    # --- Ghi kết quả về các đối tượng Snake ---
+    results = []
+    for i, snake in enumerate(snakes):
+        # Thân lúc kết thúc, theo toạ độ của đấu trường (có thể lớn hơn bàn cờ thường)
+        snake.positions = deque((c % width, c // width) for c in bodies[i])
+        snake.direction = DIRECTIONS[dir_idx[i]]
+        snake.alive = False
+        snake.grow = bool(grow[i])
+        snake.score = int(score[i])
+        snake.steps_taken = int(steps_taken[i])
+        snake.steps_since_food = int(steps_since_food[i])
+        snake.kills = int(kills[i])
+        snake.fitness = compute_fitness(snake.steps_taken, snake.score, snake.steps_since_food) + kill_bonus * snake.kills
+        results.append((snake.fitness, snake.score, snake.steps_taken))
+    return results
+
+
+def _place_food(f, foods, food_cell, food_at, grid):
+    # Đặt mồi f vào một ô trống chưa có mồi khác (giữ nguyên chỗ cũ nếu không còn ô nào)
+    if food_cell[f] >= 0 and food_at[food_cell[f]] == f:
+        food_at[food_cell[f]] = -1
+    cell = foods[f].pick_free_cell(grid.free_cells, grid.free_count) if grid.free_count else -1
+    if cell < 0 or food_at[cell] >= 0:
+        # Ô đã có mồi khác (hiếm khi xảy ra): chọn ô trống đầu tiên chưa có mồi
+        cell = next((c for c in grid.free_cells[:grid.free_count] if food_at[c] < 0), food_cell[f])
+    food_cell[f] = cell
+    foods[f].position = grid.position(int(cell))
+    food_at[cell] = f
@@ -0,0 +1,197 @@
+import numpy as np
+from game import start_episode
+from snake import MAX_STEPS_WITHOUT_FOOD, TIMEOUT_STEPS, BODY_HASH_BASE, BODY_HASH_POWERS
+from neural_network import PopulationNetwork
+from sensors import DIRECTIONS, DIRECTION_INDEX, get_sensor_tables
+from constants import *
+
+HASH_POWERS = np.array(BODY_HASH_POWERS, dtype=np.uint64)
+
+
+def run_batch_simulation(snakes, seeds=None, brains=None):
+    """Chạy một lượt chơi cho cả quần thể rắn theo kiểu lockstep.
+
+    Đầu, hướng, thân (ring buffer), mồi và mặt nạ còn sống của N con rắn được giữ
+    trong các mảng NumPy; mỗi tick mọi con còn sống tiến một bước bằng vài phép toán
+    vector. Trả về danh sách (fitness, score, steps) theo thứ tự của `snakes`, giống
+    hệt khi gọi run_simulation(snake, seed=seeds[i]) cho từng con.
+
+    `brains` (PopulationNetwork, tuỳ chọn) thay cho não của từng con rắn, tránh phải
+    xếp chồng lại khi quần thể đã ở dạng ma trận.
+    """
+    n = len(snakes)
+    if n == 0:
+        return []
+    num_cells = GRID_WIDTH * GRID_HEIGHT
+    tables = get_sensor_tables(GRID_WIDTH, GRID_HEIGHT)
+    neighbours = tables.neighbours_array
+    wall_inputs = tables.wall_inputs_array
+    food_flags = tables.food_flags_array
+
+    # --- Khởi tạo trạng thái ---
+    foods = [start_episode(snake, seeds[i] if seeds is not None else None)
+             for i, snake in enumerate(snakes)]
+    food_cell = np.array([food.position[1] * GRID_WIDTH + food.position[0] for food in foods])
+
+    dir_idx = np.array([DIRECTION_INDEX[snake.direction] for snake in snakes])
+    head_cell = np.array([snake.positions[0][1] * GRID_WIDTH + snake.positions[0][0] for snake in snakes])
+
+    # Thân rắn: ring buffer các chỉ số ô (y * GRID_WIDTH + x), đầu ở head_ptr, đuôi ở tail_ptr
+    body = np.zeros((n, num_cells), dtype=np.int64)
+    occupied = np.zeros((n, num_cells), dtype=bool)
+    head_ptr = np.zeros(n, dtype=np.int64)
+    tail_ptr = np.empty(n, dtype=np.int64)
+    # Danh sách ô trống đổi-chỗ-cuối, sao chép từ OccupancyGrid của từng con để mồi sinh ra
+    # giống hệt bản vô hướng
+    free_cells = np.empty((n, num_cells), dtype=np.int64)
+    free_index = np.empty((n, num_cells), dtype=np.int64)
+    free_count = np.empty(n, dtype=np.int64)
+    length = np.empty(n, dtype=np.int64)
+    for i, snake in enumerate(snakes):
+        cells = [y * GRID_WIDTH + x for x, y in snake.positions]
+        body[i, :len(cells)] = cells
+        occupied[i, cells] = True
+        tail_ptr[i] = len(cells) - 1
+        length[i] = len(cells)
+        free_cells[i] = snake.body_grid.free_cells
+        free_index[i] = snake.body_grid.free_index
+        free_count[i] = snake.body_grid.free_count
+
+    alive = np.array([snake.alive for snake in snakes])
+    grow = np.array([snake.grow for snake in snakes])
+    score = np.array([snake.score for snake in snakes])
+    steps_taken = np.array([snake.steps_taken for snake in snakes])
+    steps_since_food = np.array([snake.steps_since_food for snake in snakes])
+
+    # Phát hiện vòng lặp kiểu Brent: mỗi con giữ một trạng thái (mã băm thân, hướng, độ dài)
+    # đã lưu, lưu lại khi steps_since_food chạm 1, 2, 4, 8... và so sánh ở mọi bước. Trạng
+    # thái lặp lại thì rắn đi vòng mãi, như tập seen_states của Snake nhưng không cần set.
+    body_hash = np.array([snake.body_hash for snake in snakes], dtype=np.uint64)
+    saved_hash = np.zeros(n, dtype=np.uint64)
+    saved_dir = np.zeros(n, dtype=np.int64)
+    saved_len = np.full(n, -1, dtype=np.int64) # -1: chưa lưu
+    next_save = np.ones(n, dtype=np.int64)
+
+    # Bộ não của cả quần thể xếp chồng thành tensor 3 chiều
+    if brains is None:
+        brains = PopulationNetwork.from_networks([snake.brain for snake in snakes])
+
+    while alive.any():
+        a = np.flatnonzero(alive)
+        steps_taken[a] += 1
+        steps_since_food[a] += 1
+
+        # --- Cảm biến (giống Snake.get_inputs, cùng bảng tra cứu) ---
+        cell, d = head_cell[a], dir_idx[a]
+        dir_l, dir_s, dir_r = (d - 1) % 4, d, (d + 1) % 4
+
+        def is_danger(dd):
+            nb = neighbours[cell, dd]
+            return (nb < 0) | occupied[a, np.maximum(nb, 0)]
+
+        fc = food_cell[a]
+        sign_x = np.sign(tables.cell_x[fc] - tables.cell_x[cell]) + 1
+        sign_y = np.sign(tables.cell_y[fc] - tables.cell_y[cell]) + 1
+        inputs = np.empty((len(a), INPUT_NODES))
+        inputs[:, 0] = is_danger(dir_s)
+        inputs[:, 1] = is_danger(dir_l)
+        inputs[:, 2] = is_danger(dir_r)
+        inputs[:, 3:6] = food_flags[d, sign_x, sign_y]
+        inputs[:, 6] = wall_inputs[cell, dir_s]
+        inputs[:, 7] = wall_inputs[cell, dir_l]
+
+        # --- Quyết định của mạng nơ-ron cho mọi con rắn trong một lần ---
+        decision = brains.decide(inputs, a) # 0=trái, 1=thẳng, 2=phải
+        d = (d + decision - 1) % 4
+        dir_idx[a] = d
+
+        # --- Di chuyển ---
+        new_cell = neighbours[cell, d]
+        crashed = (new_cell < 0) | occupied[a, np.maximum(new_cell, 0)]
+        alive[a[crashed]] = False
+
+        moving = ~crashed
+        m, new_cell = a[moving], new_cell[moving]
+        head_cell[m] = new_cell
+        head_ptr[m] = (head_ptr[m] - 1) % num_cells
+        body[m, head_ptr[m]] = new_cell
+        occupied[m, new_cell] = True
+        _take_free_cells(free_cells, free_index, free_count, m, new_cell)
+        body_hash[m] = body_hash[m] * np.uint64(BODY_HASH_BASE) + (new_cell + 1).astype(np.uint64)
+        length[m] += 1
+
+        ate = new_cell == food_cell[m]
+        score[m[ate]] += 1
+        steps_since_food[m[ate]] = 0
+
+        # Bỏ đuôi nếu không ăn và không đang lớn (giống Snake.move)
+        not_ate = m[~ate]
+        pop = not_ate[~grow[not_ate]]
+        tail_cell = body[pop, tail_ptr[pop]]
+        occupied[pop, tail_cell] = False
+        _release_free_cells(free_cells, free_index, free_count, pop, tail_cell)
+        tail_ptr[pop] = (tail_ptr[pop] - 1) % num_cells
+        length[pop] -= 1
+        body_hash[pop] -= (tail_cell + 1).astype(np.uint64) * HASH_POWERS[length[pop]]
+        grow[not_ate] = False
+        grow[m[ate]] = True
+
+        alive[m[steps_since_food[m] > MAX_STEPS_WITHOUT_FOOD]] = False
+
+        # Vòng lặp: kết thúc ngay với đúng bộ đếm như khi bị loại vì đói
+        saved_len[m[ate]] = -1
+        next_save[m[ate]] = 1
+        c = m[alive[m]]
+        looping = c[(body_hash[c] == saved_hash[c]) & (dir_idx[c] == saved_dir[c]) & (length[c] == saved_len[c])]
+        steps_taken[looping] += TIMEOUT_STEPS - steps_since_food[looping]
+        steps_since_food[looping] = TIMEOUT_STEPS
+        alive[looping] = False
+        save = c[steps_since_food[c] == next_save[c]]
+        saved_hash[save] = body_hash[save]
+        saved_dir[save] = dir_idx[save]
+        saved_len[save] = length[save]
+        next_save[save] *= 2
+
+        # Sinh mồi mới cho những con vừa ăn (ít gặp nên làm từng con)
+        for i in m[ate]:
+            if free_count[i]:
+                food_cell[i] = foods[i].pick_free_cell(free_cells[i], free_count[i])
+                foods[i].position = (int(food_cell[i] % GRID_WIDTH), int(food_cell[i] // GRID_WIDTH))
+
+    # --- Ghi kết quả về các đối tượng Snake ---
+    results = []
+    for i, snake in enumerate(snakes):
+        snake.set_positions(_positions(body[i], head_ptr[i], tail_ptr[i], num_cells))
+        snake.direction = DIRECTIONS[dir_idx[i]]
+        snake.alive = False
+        snake.grow = bool(grow[i])
+        snake.score = int(score[i])
+        snake.steps_taken = int(steps_taken[i])
+        snake.steps_since_food = int(steps_since_food[i])
+        snake.calculate_fitness()
+        results.append((snake.fitness, snake.score, snake.steps_taken))
+    return results
+
+
+def _take_free_cells(free_cells, free_index, free_count, rows, cells):
+    # Bỏ cells khỏi danh sách ô trống của từng hàng (giống OccupancyGrid.add)
+    idx = free_index[rows, cells]
+    free_count[rows] -= 1
+    last = free_cells[rows, free_count[rows]]
+    free_cells[rows, idx] = last
+    free_index[rows, last] = idx
+    free_index[rows, cells] = -1
+
+
+def _release_free_cells(free_cells, free_index, free_count, rows, cells):
+    # Thêm cells vào cuối danh sách ô trống (giống OccupancyGrid.remove)
+    free_cells[rows, free_count[rows]] = cells
+    free_index[rows, cells] = free_count[rows]
+    free_count[rows] += 1
+
+
+def _positions(ring, head, tail, capacity):
+    # Chuyển ring buffer về danh sách (x, y) từ đầu tới đuôi
+    length = (tail - head) % capacity + 1
+    cells = ring[(head + np.arange(length)) % capacity]
+    return [(int(c % GRID_WIDTH), int(c // GRID_WIDTH)) for c in cells]
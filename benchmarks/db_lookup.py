@@ -0,0 +1,88 @@
+"""Benchmark: best-network lookup time as the neural_networks table grows.
+
+Fills a temporary database with random networks and times
+Database.load_best_neural_network (all sessions and per session), with the
+schema indexes and with them dropped, at each table size.
+
+    python benchmarks/db_lookup.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from database import Database, pack_network
+from neural_network import NeuralNetwork
+from constants import INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES
+
+INDEXES = ("idx_neural_networks_fitness", "idx_neural_networks_session_fitness")
+
+
+def fill(db, count, sessions, rng):
+    """Append `count` networks with random fitness, spread over `sessions` sessions."""
+    blob, dtype, layer_sizes = pack_network(NeuralNetwork(INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES))
+    session_ids = rng.integers(1, sessions + 1, size=count)
+    fitness = rng.random(count) * 1e5
+    db.cursor.executemany('''
+    INSERT INTO neural_networks (session_id, generation, fitness, genome, genome_dtype, layer_sizes)
+    VALUES (?, 0, ?, ?, ?, ?)
+    ''', ((int(s), float(f), blob, dtype, layer_sizes) for s, f in zip(session_ids, fitness)))
+    db.conn.commit()
+
+
+def time_lookup(db, session_id=None, repeat=20):
+    """Median seconds for one load_best_neural_network call."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.load_best_neural_network(session_id)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def run(sizes, sessions=50, repeat=20, seed=0):
+    """Return one result dict per table size."""
+    rng = np.random.default_rng(seed)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        for _ in range(sessions):
+            db.start_new_session(0, 0.0, INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES)
+        rows = 0
+        for size in sorted(sizes):
+            fill(db, size - rows, sessions, rng)
+            rows = size
+            result = {
+                "rows": size,
+                "indexed_all_ms": time_lookup(db, repeat=repeat) * 1e3,
+                "indexed_session_ms": time_lookup(db, 1, repeat=repeat) * 1e3,
+            }
+            for name in INDEXES:
+                db.cursor.execute(f"DROP INDEX {name}")
+            result["unindexed_all_ms"] = time_lookup(db, repeat=max(1, repeat // 4)) * 1e3
+            result["unindexed_session_ms"] = time_lookup(db, 1, repeat=max(1, repeat // 4)) * 1e3
+            db._create_indexes()
+            db.conn.commit()
+            results.append(result)
+        db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark best-network lookup against table size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'Rows':>8} {'Best (idx)':>12} {'Session (idx)':>14} {'Best (no idx)':>14} {'Session (no idx)':>17}")
+    for r in run(args.sizes, args.sessions, args.repeat):
+        print(f"{r['rows']:>8} {r['indexed_all_ms']:>10.3f}ms {r['indexed_session_ms']:>12.3f}ms "
+              f"{r['unindexed_all_ms']:>12.3f}ms {r['unindexed_session_ms']:>15.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Load generator for inference_server.py: latency percentiles and throughput.
+
+Runs `--clients` concurrent connections, each sending one request at a time
+(closed loop) with random sensor inputs for a random session, for
+`--duration` seconds, then prints p50/p90/p99/max latency, requests per
+second and the server's mean batch size.
+
+Without --port a server is started in a child process on a temporary
+database filled with `--sessions` random networks:
+
+    python benchmarks/inference_load.py --clients 64 --duration 5
+    python benchmarks/inference_load.py --clients 64 --window-ms 0 --max-batch 1   # no batching
+    python benchmarks/inference_load.py --port 5858 --sessions 3                   # running server
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from database import Database
+from neural_network import NeuralNetwork
+from inference_server import serve
+from policy_table import policy_inputs
+from constants import INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES, GRID_WIDTH, GRID_HEIGHT
+
+BENCH_PORT = 5859
+
+
+def make_database(path, sessions):
+    """Create a database holding one random network per session."""
+    db = Database(path)
+    for _ in range(sessions):
+        session_id = db.start_new_session(0, 0.0, INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES)
+        db.save_neural_network(session_id, 0, 1.0, NeuralNetwork(INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES))
+    db.close()
+
+
+def _server_main(port, db_name, cache_size, window, max_batch, ready):
+    asyncio.run(serve("127.0.0.1", port, db_name, cache_size, window, max_batch, ready))
+
+
+async def _client(host, port, deadline, sessions, inputs, rng, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            request = {"session_id": int(rng.integers(1, sessions + 1)),
+                       "inputs": inputs[rng.integers(len(inputs))].tolist()}
+            start = time.perf_counter()
+            writer.write((json.dumps(request) + "\n").encode())
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            if "error" in response:
+                raise RuntimeError(response["error"])
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def _stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"stats": true}\n')
+    await writer.drain()
+    stats = json.loads(await reader.readline())
+    writer.close()
+    return stats
+
+
+async def generate_load(host, port, clients, duration, sessions, seed=0):
+    """Return (latencies in seconds, elapsed seconds, server stats)."""
+    inputs = policy_inputs(max(GRID_WIDTH, GRID_HEIGHT))
+    before = await _stats(host, port)
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(_client(host, port, deadline, sessions, inputs, np.random.default_rng(seed + i), latencies)
+                           for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    after = await _stats(host, port)
+    batches = after["batches"] - before["batches"]
+    after["mean_batch_size"] = (after["requests"] - before["requests"]) / batches if batches else 0.0
+    return np.array(latencies), elapsed, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure inference_server.py latency and throughput")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Use a server that is already running (default: start one)")
+    parser.add_argument("--clients", type=int, default=64, help="Concurrent connections")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of load")
+    parser.add_argument("--sessions", type=int, default=4, help="Sessions to spread requests over")
+    parser.add_argument("--cache-size", type=int, default=8, help="Started server: networks kept in memory")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="Started server: batching window")
+    parser.add_argument("--max-batch", type=int, default=256, help="Started server: largest batch")
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    with tempfile.TemporaryDirectory() as tmp:
+        if port is None:
+            port = BENCH_PORT
+            db_name = os.path.join(tmp, "bench.db")
+            make_database(db_name, args.sessions)
+            ready = multiprocessing.Event()
+            server = multiprocessing.Process(target=_server_main, daemon=True,
+                                             args=(port, db_name, args.cache_size, args.window_ms / 1000, args.max_batch, ready))
+            server.start()
+            if not ready.wait(10):
+                sys.exit("Inference server did not start")
+        try:
+            latencies, elapsed, stats = asyncio.run(
+                generate_load(args.host, port, args.clients, args.duration, args.sessions))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.join()
+
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1e3
+    print(f"{'Requests':<20} {len(latencies)}")
+    print(f"{'Throughput':<20} {len(latencies) / elapsed:.0f} req/s")
+    print(f"{'Latency p50':<20} {p50:.2f} ms")
+    print(f"{'Latency p90':<20} {p90:.2f} ms")
+    print(f"{'Latency p99':<20} {p99:.2f} ms")
+    print(f"{'Latency max':<20} {latencies.max() * 1e3:.2f} ms")
+    print(f"{'Mean batch size':<20} {stats['mean_batch_size']:.1f}")
+    print(f"{'Models cached':<20} {stats['models']} (hits {stats['cache_hits']}, misses {stats['cache_misses']}, "
+          f"evictions {stats['cache_evictions']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Benchmark suite for the training hot paths.
+
+Times, with fixed seeds:
+  - Snake.move steps per second (single snake, scalar engine)
+  - NeuralNetwork.feedforward latency
+  - Food.randomize_position cost at several snake lengths
+  - the selection/crossover/mutation phase of GeneticAlgorithm.run_generation
+  - Database save (write-behind, one generation per transaction) and load throughput
+
+Results are printed as a table and can be written as JSON. Given a baseline
+JSON file (written earlier with --save-baseline), every metric is compared
+with it and the script exits with status 1 if any metric regressed by more
+than --tolerance.
+
+    python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json --output results.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from snake import Snake
+from food import Food
+from grid import OccupancyGrid
+from neural_network import NeuralNetwork
+from genetic_algorithm import GeneticAlgorithm
+from database import Database
+from constants import *
+
+FOOD_LENGTHS = (1, 100, 300, 550)
+
+
+def _median_seconds(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def metric(value, unit, higher_is_better):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def bench_snake_move(steps=20000, seed=0):
+    """Snake.move calls per second, restarting the episode whenever the snake dies."""
+    np.random.seed(seed)
+    rng = random.Random(seed)
+    brains = [NeuralNetwork(INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES) for _ in range(16)]
+    moves = 0
+    elapsed = 0.0
+    episode = 0
+    while moves < steps:
+        snake = Snake(brain=brains[episode % len(brains)], copy_brain=False)
+        snake.direction = rng.choice([UP, DOWN, LEFT, RIGHT])
+        food = Food(rng=rng)
+        food.randomize_position(snake.body_grid)
+        episode += 1
+        start = time.perf_counter()
+        while snake.alive and moves < steps:
+            snake.move(food.position)
+            moves += 1
+            if snake.get_head_position() == food.position:
+                food.randomize_position(snake.body_grid)
+        elapsed += time.perf_counter() - start
+    return {"snake_move_steps_per_s": metric(moves / elapsed, "steps/s", True)}
+
+
+def bench_feedforward(calls=20000, seed=0):
+    """Median latency of one NeuralNetwork.feedforward call on a sensor vector."""
+    np.random.seed(seed)
+    nn = NeuralNetwork(INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES)
+    inputs = [list(np.random.rand(INPUT_NODES)) for _ in range(64)]
+
+    def batch():
+        for i in range(1000):
+            nn.feedforward(inputs[i & 63])
+
+    seconds = _median_seconds(batch, max(1, calls // 1000))
+    return {"feedforward_us": metric(seconds / 1000 * 1e6, "us", False)}
+
+
+def _snake_body(length):
+    # A body of `length` cells snaking row by row from the top-left corner
+    cells = []
+    for y in range(GRID_HEIGHT):
+        xs = range(GRID_WIDTH) if y % 2 == 0 else range(GRID_WIDTH - 1, -1, -1)
+        cells.extend((x, y) for x in xs)
+    return cells[:length]
+
+
+def bench_food(lengths=FOOD_LENGTHS, calls=2000, seed=0):
+    """Cost of Food.randomize_position with an OccupancyGrid, and with a plain list of positions."""
+    results = {}
+    for length in lengths:
+        body = _snake_body(length)
+        grid = OccupancyGrid(positions=body)
+        food = Food(rng=random.Random(seed))
+        seconds = _median_seconds(lambda: [food.randomize_position(grid) for _ in range(calls)], 5)
+        results[f"food_grid_len{length}_us"] = metric(seconds / calls * 1e6, "us", False)
+        # The old retry loop over a list of positions, for comparison
+        food = Food(rng=random.Random(seed))
+        list_calls = max(1, calls // 20)
+        seconds = _median_seconds(lambda: [food.randomize_position(body) for _ in range(list_calls)], 5)
+        results[f"food_list_len{length}_us"] = metric(seconds / list_calls * 1e6, "us", False)
+    return results
+
+
+def bench_reproduction(population_size=POPULATION_SIZE, repeat=20, seed=0):
+    """Selection + crossover + mutation for one generation (GeneticAlgorithm._reproduce)."""
+    ga = GeneticAlgorithm(population_size, MUTATION_RATE, INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES,
+                          use_database=False, seed=seed)
+    fitness = np.random.default_rng(seed).random(population_size) * 1000
+    ga.best_snake_brain = NeuralNetwork.from_genome(ga.genomes[0].copy(), INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES)
+    seconds = _median_seconds(lambda: ga._reproduce(fitness), repeat)
+    return {"reproduction_ms": metric(seconds * 1e3, "ms", False)}
+
+
+def bench_database(generations=200, loads=200, seed=0):
+    """Generations written per second (stats + best network + session update) and best-network loads per second."""
+    np.random.seed(seed)
+    nn = NeuralNetwork(INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"), write_behind=True)
+        session_id = db.start_new_session(POPULATION_SIZE, MUTATION_RATE, INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES)
+        start = time.perf_counter()
+        for generation in range(1, generations + 1):
+            db.save_generation_stats(session_id, generation, float(generation), generation / 2)
+            db.save_neural_network(session_id, generation, float(generation), nn)
+            db.update_session(session_id, generation, float(generation), generation / 2)
+            db.end_generation()
+        db.flush(wait=True)
+        save_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(loads):
+            db.load_best_neural_network(session_id)
+        load_seconds = time.perf_counter() - start
+        db.close()
+    return {
+        "db_save_generations_per_s": metric(generations / save_seconds, "gen/s", True),
+        "db_load_best_per_s": metric(loads / load_seconds, "loads/s", True),
+    }
+
+
+BENCHMARKS = {
+    "snake_move": bench_snake_move,
+    "feedforward": bench_feedforward,
+    "food": bench_food,
+    "reproduction": bench_reproduction,
+    "database": bench_database,
+}
+
+
+def run(names=None, seed=0):
+    """Run the selected benchmarks (all by default) and return {metric name: metric dict}."""
+    results = {}
+    for name in names or BENCHMARKS:
+        results.update(BENCHMARKS[name](seed=seed))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return [(name, change)] for metrics worse than the baseline by more than `tolerance` (0.1 = 10%)."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old, new = baseline[name]["value"], result["value"]
+        # Relative change, positive means better
+        change = (new - old) / old if result["higher_is_better"] else (old - new) / old
+        result["baseline"] = old
+        result["change"] = change
+        if change < -tolerance:
+            regressions.append((name, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation, NN, GA and database hot paths")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a JSON file written by --save-baseline")
+    parser.add_argument("--save-baseline", help="Write the results to this file as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before a metric counts as a regression (default: 0.25)")
+    args = parser.parse_args()
+
+    results = run(args.only, args.seed)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+    print(f"{'Metric':<28} {'Value':>14} {'Unit':<8} {'vs baseline':>12}")
+    for name, result in results.items():
+        change = f"{result['change']:+.1%}" if "change" in result else ""
+        print(f"{name:<28} {result['value']:>14.3f} {result['unit']:<8} {change:>12}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if regressions:
+        print("\nRegressions:")
+        for name, change in regressions:
+            print(f"  {name}: {change:+.1%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import json
+import os
+import struct
+import numpy as np
+
+# Định dạng file checkpoint:
+#   MAGIC | độ dài header (uint32, little-endian) | header JSON | các mảng thô, mỗi mảng căn lề 64 byte
+# Header ghi lại dtype/shape/offset của từng mảng nên có thể np.memmap thẳng vào file.
+MAGIC = b'SNAKECK1'
+ALIGNMENT = 64
+
+
+def save_checkpoint(path, arrays, meta):
+    """Ghi các mảng NumPy (dict tên -> mảng) cùng metadata (dict JSON được) vào `path`.
+
+    Ghi ra file tạm rồi os.replace, nên checkpoint cũ không bao giờ bị hỏng giữa chừng.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    # Tính offset với header giả định, lặp lại đến khi kích thước header ổn định
+    header_size = 0
+    while True:
+        offset = len(MAGIC) + 4 + header_size
+        layout = {}
+        for name, array in arrays.items():
+            offset += -offset % ALIGNMENT
+            layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += array.nbytes
+        header = json.dumps({'meta': meta, 'arrays': layout}).encode()
+        if len(header) == header_size:
+            break
+        header_size = len(header)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.write(b'\0' * (layout[name]['offset'] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """Đọc checkpoint: trả về (dict tên -> mảng memmap chỉ đọc, meta)."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a training checkpoint")
+        header_size, = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_size))
+
+    arrays = {}
+    for name, info in header['arrays'].items():
+        shape = tuple(info['shape'])
+        if np.prod(shape) == 0:
+            arrays[name] = np.empty(shape, dtype=info['dtype'])
+        else:
+            arrays[name] = np.memmap(path, dtype=info['dtype'], mode='r', offset=info['offset'], shape=shape)
+    return arrays, header['meta']
@@ -1,5 +1,3 @@
-import pygame
-
 # Kích thước màn hình và ô lưới
 WIDTH, HEIGHT = 600, 400
 GRID_SIZE = 20
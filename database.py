@@ -2,14 +2,139 @@ import sqlite3
 import numpy as np
 import json
 import os
+from pathlib import Path
+import atexit
+import queue
+import threading
+
+# Schema version stored in PRAGMA user_version.
+# 1: weights stored as JSON text columns (legacy)
+# 2: one packed binary blob per network (genome, genome_dtype, layer_sizes)
+# 3: indexes for best-network lookups and per-session generation stats
+# 4: per-phase timings and simulated steps in generation_stats
+# 5: recorded episodes (seed + packed action stream)
+# 6: compiled policy tables (one uint8 action per discrete sensor input)
+SCHEMA_VERSION = 6
+
+# Columns added to older databases by _upgrade_schema: (table, column, type)
+ADDED_COLUMNS = (
+    ('neural_networks', 'genome', 'BLOB'),
+    ('neural_networks', 'genome_dtype', 'TEXT'),
+    ('neural_networks', 'layer_sizes', 'TEXT'),
+    ('generation_stats', 'evaluation_seconds', 'REAL'),
+    ('generation_stats', 'selection_seconds', 'REAL'),
+    ('generation_stats', 'crossover_seconds', 'REAL'),
+    ('generation_stats', 'database_seconds', 'REAL'),
+    ('generation_stats', 'display_seconds', 'REAL'),
+    ('generation_stats', 'total_steps', 'INTEGER'),
+    ('generation_stats', 'steps_per_second', 'REAL'),
+)
+
+# Optional per-generation measurements accepted by save_generation_stats
+TIMING_COLUMNS = tuple(column for table, column, _ in ADDED_COLUMNS if table == 'generation_stats')
+
+# Seconds to wait for a lock held by another training run before failing
+BUSY_TIMEOUT = 30.0
+
+def pack_network(neural_network):
+    """Pack a network into (blob, dtype, layer_sizes) for the neural_networks table."""
+    genome = neural_network.to_genome()
+    layer_sizes = f"{neural_network.input_nodes},{neural_network.hidden_nodes},{neural_network.output_nodes}"
+    return genome.tobytes(), genome.dtype.str, layer_sizes
+
+def unpack_network(blob, dtype, layer_sizes):
+    """Inverse of pack_network."""
+    from neural_network import NeuralNetwork
+    input_nodes, hidden_nodes, output_nodes = (int(n) for n in layer_sizes.split(","))
+    return NeuralNetwork.from_bytes(blob, input_nodes, hidden_nodes, output_nodes, dtype=np.dtype(dtype))
+
+def _network_from_json(weights_ih, weights_ho, bias_h, bias_o, input_nodes, hidden_nodes, output_nodes):
+    """Rebuild a network stored in the legacy JSON text columns."""
+    from neural_network import NeuralNetwork
+    # JSON rows were written from float64 arrays, keep that precision
+    return NeuralNetwork(
+        input_nodes, hidden_nodes, output_nodes,
+        weights_ih=np.array(json.loads(weights_ih)),
+        weights_ho=np.array(json.loads(weights_ho)),
+        bias_h=np.array(json.loads(bias_h)),
+        bias_o=np.array(json.loads(bias_o)),
+        dtype=np.float64
+    )
+
+def _fetch_best_network(cursor, session_id=None):
+    """Run the best-network query on `cursor` and rebuild the network (None if there is none).
+
+    Works on both layouts, keyed on the columns present: a file that has not been
+    upgraded yet (e.g. opened read-only) has only the legacy JSON columns.
+    """
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(neural_networks)')}
+    if 'genome' in columns:
+        blob_columns = 'nn.genome, nn.genome_dtype, nn.layer_sizes'
+    else:
+        blob_columns = 'NULL, NULL, NULL'
+    query = f'''
+    SELECT {blob_columns},
+           nn.weights_ih, nn.weights_ho, nn.bias_h, nn.bias_o, ts.input_nodes, ts.hidden_nodes, ts.output_nodes
+    FROM neural_networks nn
+    JOIN training_sessions ts ON nn.session_id = ts.id
+    '''
+    if session_id:
+        cursor.execute(query + 'WHERE nn.session_id = ? ORDER BY nn.fitness DESC LIMIT 1', (session_id,))
+    else:
+        cursor.execute(query + 'ORDER BY nn.fitness DESC LIMIT 1')
+
+    result = cursor.fetchone()
+
+    if result:
+        genome, genome_dtype, layer_sizes = result[:3]
+        if genome is not None:
+            return unpack_network(genome, genome_dtype, layer_sizes)
+        # Legacy row: weights stored as JSON text
+        return _network_from_json(*result[3:])
+    return None
+
+def load_best_network_readonly(db_name, session_id=None):
+    """Like Database.load_best_neural_network, but opens `db_name` read-only.
+
+    No schema setup or upgrade runs on the file, and a missing file raises
+    FileNotFoundError instead of creating an empty database.
+    """
+    if not os.path.isfile(db_name):
+        raise FileNotFoundError(f"Database {db_name} not found")
+    conn = sqlite3.connect(Path(db_name).resolve().as_uri() + "?mode=ro", uri=True, timeout=BUSY_TIMEOUT)
+    try:
+        return _fetch_best_network(conn.cursor(), session_id)
+    finally:
+        conn.close()
 
 class Database:
-    def __init__(self, db_name="snake_training.db"):
-        """Initialize database connection and create tables if they don't exist."""
+    def __init__(self, db_name="snake_training.db", write_behind=False, flush_every=1):
+        """Initialize database connection and create tables if they don't exist.
+        
+        With write_behind=True, update_session, save_generation_stats and save_neural_network
+        only queue their writes. Every flush_every calls to end_generation() the queued writes
+        are handed to a background thread that commits them in a single transaction.
+        """
         self.db_name = db_name
-        self.conn = sqlite3.connect(self.db_name)
+        self.conn = sqlite3.connect(self.db_name, timeout=BUSY_TIMEOUT)
         self.cursor = self.conn.cursor()
+        # WAL lets several training runs read while one writes; wait for locks instead of failing
+        self.cursor.execute('PRAGMA journal_mode=WAL')
+        self.cursor.execute(f'PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}')
         self._create_tables()
+        
+        self.write_behind = write_behind
+        self.flush_every = max(1, flush_every)
+        self._pending = []
+        self._generations_pending = 0
+        self._writer = None
+        self._writer_error = None
+        if write_behind:
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+            self._writer.start()
+            # Make sure queued writes reach the disk even if the program exits via sys.exit()
+            atexit.register(self.close)
     
     def _create_tables(self):
         """Create necessary tables for storing neural network data."""
@@ -40,6 +165,9 @@ class Database:
             weights_ho TEXT,
             bias_h TEXT,
             bias_o TEXT,
+            genome BLOB,
+            genome_dtype TEXT,
+            layer_sizes TEXT,
             FOREIGN KEY (session_id) REFERENCES training_sessions (id)
         )
         ''')
@@ -52,12 +180,128 @@ class Database:
             generation INTEGER,
             max_fitness REAL,
             avg_fitness REAL,
+            evaluation_seconds REAL,
+            selection_seconds REAL,
+            crossover_seconds REAL,
+            database_seconds REAL,
+            display_seconds REAL,
+            total_steps INTEGER,
+            steps_per_second REAL,
+            FOREIGN KEY (session_id) REFERENCES training_sessions (id)
+        )
+        ''')
+        
+        # Table for recorded episodes: enough to replay a game without the network
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS episodes (
+            id INTEGER PRIMARY KEY,
+            session_id INTEGER,
+            generation INTEGER,
+            fitness REAL,
+            score INTEGER,
+            steps INTEGER,
+            seed INTEGER,
+            num_actions INTEGER,
+            actions BLOB,
+            FOREIGN KEY (session_id) REFERENCES training_sessions (id)
+        )
+        ''')
+        
+        # Table for brains compiled into action lookup tables, keyed by the genome they were compiled from
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS policy_tables (
+            id INTEGER PRIMARY KEY,
+            session_id INTEGER,
+            genome_digest BLOB UNIQUE,
+            distances INTEGER,
+            actions BLOB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (session_id) REFERENCES training_sessions (id)
         )
         ''')
         
+        self._upgrade_schema()
+        self._create_indexes()
         self.conn.commit()
     
+    def _create_indexes(self):
+        """Indexes that keep load_best_neural_network and per-session queries from scanning whole tables."""
+        # ORDER BY fitness DESC LIMIT 1 across all sessions
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_neural_networks_fitness
+        ON neural_networks (fitness)
+        ''')
+        # WHERE session_id = ? ORDER BY fitness DESC LIMIT 1
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_neural_networks_session_fitness
+        ON neural_networks (session_id, fitness)
+        ''')
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_generation_stats_session_generation
+        ON generation_stats (session_id, generation)
+        ''')
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_episodes_session_fitness
+        ON episodes (session_id, fitness)
+        ''')
+    
+    def _upgrade_schema(self):
+        """Bring an older database up to SCHEMA_VERSION (adds columns only, keeps existing rows)."""
+        version = self.cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        for table, column, column_type in ADDED_COLUMNS:
+            columns = {row[1] for row in self.cursor.execute(f'PRAGMA table_info({table})')}
+            if column not in columns:
+                self.cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+        self.cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    
+    def _writer_loop(self):
+        """Background thread: commit each queued batch of writes in one transaction."""
+        conn = sqlite3.connect(self.db_name, timeout=BUSY_TIMEOUT)
+        conn.execute(f'PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}')
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    break
+                with conn:
+                    for query, params in batch:
+                        conn.execute(query, params)
+            except sqlite3.Error as e:
+                self._writer_error = e
+            finally:
+                self._queue.task_done()
+        conn.close()
+    
+    def _write(self, query, params):
+        """Execute a write now, or queue it when write-behind is enabled."""
+        if self.write_behind:
+            self._pending.append((query, params))
+        else:
+            self.cursor.execute(query, params)
+            self.conn.commit()
+    
+    def end_generation(self):
+        """Mark the end of a generation's writes; flushes every flush_every generations."""
+        self._generations_pending += 1
+        if self._generations_pending >= self.flush_every:
+            self.flush()
+    
+    def flush(self, wait=False):
+        """Hand queued writes to the background writer (and optionally wait until committed)."""
+        if not self._writer:
+            return
+        if self._pending:
+            self._queue.put(self._pending)
+            self._pending = []
+        self._generations_pending = 0
+        if wait:
+            self._queue.join()
+        if self._writer_error:
+            error, self._writer_error = self._writer_error, None
+            raise error
+    
     def start_new_session(self, population_size, mutation_rate, input_nodes, hidden_nodes, output_nodes):
         """Start a new training session and return the session ID."""
         self.cursor.execute('''
@@ -69,82 +313,124 @@ class Database:
     
     def update_session(self, session_id, generations, best_fitness, avg_fitness):
         """Update training session with final results."""
-        self.cursor.execute('''
+        self._write('''
         UPDATE training_sessions 
         SET generations = ?, best_fitness = ?, avg_fitness = ?
         WHERE id = ?
         ''', (generations, best_fitness, avg_fitness, session_id))
-        self.conn.commit()
     
-    def save_generation_stats(self, session_id, generation, max_fitness, avg_fitness):
-        """Save statistics for a generation."""
-        self.cursor.execute('''
-        INSERT INTO generation_stats (session_id, generation, max_fitness, avg_fitness)
-        VALUES (?, ?, ?, ?)
-        ''', (session_id, generation, max_fitness, avg_fitness))
-        self.conn.commit()
+    def save_generation_stats(self, session_id, generation, max_fitness, avg_fitness, timings=None):
+        """Save statistics for a generation.
+
+        `timings` optionally maps TIMING_COLUMNS (seconds per phase, total_steps,
+        steps_per_second) to their values for this generation.
+        """
+        timings = timings or {}
+        unknown = set(timings) - set(TIMING_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown generation_stats columns: {sorted(unknown)}")
+        columns = ['session_id', 'generation', 'max_fitness', 'avg_fitness'] + list(timings)
+        self._write(f'''
+        INSERT INTO generation_stats ({', '.join(columns)})
+        VALUES ({', '.join('?' * len(columns))})
+        ''', (session_id, generation, max_fitness, avg_fitness, *timings.values()))
     
     def save_neural_network(self, session_id, generation, fitness, neural_network):
         """Save a neural network to the database."""
-        # Convert numpy arrays to JSON strings for storage
-        weights_ih = json.dumps(neural_network.weights_ih.tolist())
-        weights_ho = json.dumps(neural_network.weights_ho.tolist())
-        bias_h = json.dumps(neural_network.bias_h.tolist())
-        bias_o = json.dumps(neural_network.bias_o.tolist())
+        # Store all parameters as one packed binary blob
+        genome, genome_dtype, layer_sizes = pack_network(neural_network)
         
-        self.cursor.execute('''
-        INSERT INTO neural_networks (session_id, generation, fitness, weights_ih, weights_ho, bias_h, bias_o)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (session_id, generation, fitness, weights_ih, weights_ho, bias_h, bias_o))
-        self.conn.commit()
+        self._write('''
+        INSERT INTO neural_networks (session_id, generation, fitness, genome, genome_dtype, layer_sizes)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', (session_id, generation, fitness, genome, genome_dtype, layer_sizes))
     
-    def load_best_neural_network(self, session_id=None):
-        """Load the best neural network from a session or across all sessions."""
-        from neural_network import NeuralNetwork
-        
+    def save_episode(self, session_id, generation, episode):
+        """Save a recorded episode (recording.Episode); generation may be None for demo games."""
+        from recording import pack_actions
+        self._write('''
+        INSERT INTO episodes (session_id, generation, fitness, score, steps, seed, num_actions, actions)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (session_id, generation, episode.fitness, episode.score, episode.steps,
+              episode.seed, len(episode.actions), pack_actions(episode.actions)))
+    
+    def load_episode(self, episode_id=None, session_id=None):
+        """Load one episode by ID, or the best (highest fitness) episode of a session or of all sessions."""
+        from recording import Episode, unpack_actions
+        self.flush(wait=True)
+        query = 'SELECT seed, num_actions, actions, score, steps, fitness FROM episodes'
+        if episode_id:
+            self.cursor.execute(query + ' WHERE id = ?', (episode_id,))
+        elif session_id:
+            self.cursor.execute(query + ' WHERE session_id = ? ORDER BY fitness DESC LIMIT 1', (session_id,))
+        else:
+            self.cursor.execute(query + ' ORDER BY fitness DESC LIMIT 1')
+        result = self.cursor.fetchone()
+        if not result:
+            return None
+        seed, num_actions, actions, score, steps, fitness = result
+        return Episode(seed, unpack_actions(actions, num_actions).tolist(), score, steps, fitness)
+    
+    def get_episodes(self, session_id=None):
+        """List recorded episodes as (id, session_id, generation, fitness, score, steps), best first."""
+        self.flush(wait=True)
+        query = 'SELECT id, session_id, generation, fitness, score, steps FROM episodes'
         if session_id:
-            query = '''
-            SELECT nn.weights_ih, nn.weights_ho, nn.bias_h, nn.bias_o, ts.input_nodes, ts.hidden_nodes, ts.output_nodes
-            FROM neural_networks nn
-            JOIN training_sessions ts ON nn.session_id = ts.id
-            WHERE nn.session_id = ?
-            ORDER BY nn.fitness DESC
-            LIMIT 1
-            '''
-            self.cursor.execute(query, (session_id,))
+            self.cursor.execute(query + ' WHERE session_id = ? ORDER BY fitness DESC', (session_id,))
         else:
-            query = '''
-            SELECT nn.weights_ih, nn.weights_ho, nn.bias_h, nn.bias_o, ts.input_nodes, ts.hidden_nodes, ts.output_nodes
-            FROM neural_networks nn
-            JOIN training_sessions ts ON nn.session_id = ts.id
-            ORDER BY nn.fitness DESC
-            LIMIT 1
-            '''
-            self.cursor.execute(query)
+            self.cursor.execute(query + ' ORDER BY fitness DESC')
+        return self.cursor.fetchall()
+    
+    def save_policy_table(self, session_id, genome_digest, policy):
+        """Save a compiled policy_table.PolicyTable for the genome with this digest (replaces an older one)."""
+        self._write('''
+        INSERT OR REPLACE INTO policy_tables (session_id, genome_digest, distances, actions)
+        VALUES (?, ?, ?, ?)
+        ''', (session_id, genome_digest, policy.distances, policy.actions))
         
+    def load_policy_table(self, genome_digest):
+        """Load the policy table compiled from the genome with this digest, or None if it was never compiled."""
+        from policy_table import PolicyTable
+        self.flush(wait=True)
+        self.cursor.execute('SELECT distances, actions FROM policy_tables WHERE genome_digest = ?', (genome_digest,))
         result = self.cursor.fetchone()
+        if not result:
+            return None
+        distances, actions = result
+        return PolicyTable(actions, distances)
+    
+    def load_best_neural_network(self, session_id=None):
+        """Load the best neural network from a session or across all sessions."""
+        self.flush(wait=True)
+        return _fetch_best_network(self.cursor, session_id)
+    
+    def migrate_legacy_networks(self, vacuum=True):
+        """Convert legacy JSON rows to binary blobs in place. Returns the number of rows converted."""
+        rows = self.cursor.execute('''
+        SELECT nn.id, nn.weights_ih, nn.weights_ho, nn.bias_h, nn.bias_o, ts.input_nodes, ts.hidden_nodes, ts.output_nodes
+        FROM neural_networks nn
+        JOIN training_sessions ts ON nn.session_id = ts.id
+        WHERE nn.genome IS NULL AND nn.weights_ih IS NOT NULL
+        ''').fetchall()
         
-        if result:
-            weights_ih, weights_ho, bias_h, bias_o, input_nodes, hidden_nodes, output_nodes = result
-            
-            # Convert JSON strings back to numpy arrays
-            weights_ih = np.array(json.loads(weights_ih))
-            weights_ho = np.array(json.loads(weights_ho))
-            bias_h = np.array(json.loads(bias_h))
-            bias_o = np.array(json.loads(bias_o))
-            
-            # Create and return a neural network with the loaded parameters
-            return NeuralNetwork(
-                input_nodes, hidden_nodes, output_nodes,
-                weights_ih=weights_ih,
-                weights_ho=weights_ho,
-                bias_h=bias_h,
-                bias_o=bias_o
-            )
-        return None
+        for row in rows:
+            genome, genome_dtype, layer_sizes = pack_network(_network_from_json(*row[1:]))
+            self.cursor.execute('''
+            UPDATE neural_networks
+            SET genome = ?, genome_dtype = ?, layer_sizes = ?,
+                weights_ih = NULL, weights_ho = NULL, bias_h = NULL, bias_o = NULL
+            WHERE id = ?
+            ''', (genome, genome_dtype, layer_sizes, row[0]))
+        self.conn.commit()
+        
+        # Give the space used by the JSON text back to the file system
+        if vacuum and rows:
+            self.conn.execute('VACUUM')
+        return len(rows)
     
     def get_all_sessions(self):
         """Get a list of all training sessions."""
+        self.flush(wait=True)
         self.cursor.execute('''
         SELECT id, start_time, generations, population_size, mutation_rate, 
                input_nodes, hidden_nodes, output_nodes, best_fitness, avg_fitness
@@ -153,7 +439,47 @@ class Database:
         ''')
         return self.cursor.fetchall()
     
+    def get_session_timings(self):
+        """Per-session timing summary: {session_id: dict} with the average seconds per phase,
+        average steps per second and the slowest generation (by total timed seconds).
+
+        Generations saved before timings were recorded are ignored.
+        """
+        self.flush(wait=True)
+        phase_columns = [column for column in TIMING_COLUMNS if column.endswith('_seconds')]
+        total = ' + '.join(f'COALESCE({column}, 0)' for column in phase_columns)
+        averages = ', '.join(f'AVG({column})' for column in phase_columns)
+        summary = {}
+        for row in self.cursor.execute(f'''
+        SELECT session_id, COUNT(*), {averages}, AVG(steps_per_second), MAX({total})
+        FROM generation_stats
+        WHERE evaluation_seconds IS NOT NULL
+        GROUP BY session_id
+        '''):
+            session_id, count = row[:2]
+            summary[session_id] = dict(zip(phase_columns, row[2:2 + len(phase_columns)]))
+            summary[session_id].update(generations=count, steps_per_second=row[-2], slowest_seconds=row[-1])
+        for session_id, info in summary.items():
+            info['slowest_generation'] = self.cursor.execute(f'''
+            SELECT generation FROM generation_stats
+            WHERE session_id = ? AND evaluation_seconds IS NOT NULL
+            ORDER BY {total} DESC LIMIT 1
+            ''', (session_id,)).fetchone()[0]
+        return summary
+    
     def close(self):
-        """Close the database connection."""
+        """Flush queued writes, stop the background writer and close the database connection."""
+        if self._writer:
+            if self._pending:
+                self._queue.put(self._pending)
+                self._pending = []
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+            atexit.unregister(self.close)
         if self.conn:
-            self.conn.close() 
\ No newline at end of file
+            self.conn.close()
+            self.conn = None
+        if self._writer_error:
+            error, self._writer_error = self._writer_error, None
+            raise error
\ No newline at end of file
@@ -4,11 +4,16 @@ import argparse
 from database import Database
 from snake import Snake
 from game import run_simulation
+from recording import Episode
+from policy_table import compile_policy
+from fitness_cache import genome_digest
 
 def main():
     parser = argparse.ArgumentParser(description='Demo Snake Game with saved neural network model')
     parser.add_argument('--session-id', type=int, help='Load best neural network from a specific session ID')
     parser.add_argument('--games', type=int, default=3, help='Number of games to run with the loaded model')
+    parser.add_argument('--network', action='store_true', help='Run the neural network every step instead of the compiled lookup table')
+    parser.add_argument('--record', action='store_true', help='Save every game to the database so it can be replayed with replay.py')
     args = parser.parse_args()
 
     pygame.init()
@@ -46,21 +51,43 @@ def main():
     
     # Load the best neural network from the selected session
     best_network = db.load_best_neural_network(selected_id)
-    db.close()
     
     if not best_network:
         print(f"No neural network found for session {selected_id}")
+        db.close()
         pygame.quit()
         sys.exit()
     
     print(f"\nLoaded best neural network from session {selected_id}")
+
+    # Chọn hành động bằng bảng tra đã biên dịch (cho đúng quyết định của mạng); biên dịch
+    # một lần rồi lưu vào database nếu bộ não này chưa có bảng
+    policy = None
+    if not args.network:
+        digest = genome_digest(best_network.genome)
+        policy = db.load_policy_table(digest)
+        if policy is None:
+            policy = compile_policy(best_network)
+            db.save_policy_table(selected_id, digest, policy)
+            print(f"Compiled the network into a {len(policy)}-entry lookup table and saved it to the database")
+        else:
+            print(f"Using the compiled lookup table ({len(policy)} entries)")
+    if not args.record:
+        db.close()
     
     # Run the model for specified number of games
     for game_num in range(args.games):
         print(f"\nRunning game {game_num + 1}/{args.games}...")
-        snake = Snake(brain=best_network.clone(), color=(0, 150, 255))
-        fitness, score, steps = run_simulation(snake, display=True)
+        if policy is not None:
+            snake = Snake(random_brain=False, policy=policy, color=(0, 150, 255))
+        else:
+            snake = Snake(brain=best_network.clone(), color=(0, 150, 255))
+        episode = Episode() if args.record else None
+        fitness, score, steps = run_simulation(snake, display=True, recording=episode)
         print(f"Game {game_num + 1} results - Score: {score}, Fitness: {fitness:.2f}, Steps: {steps}")
+        if episode:
+            db.save_episode(selected_id, None, episode)
+            print(f"Recorded game with seed {episode.seed} ({len(episode.actions)} actions)")
         
         # Process events between games
         for event in pygame.event.get():
@@ -69,6 +96,8 @@ def main():
                 sys.exit()
     
     print("\nDemo complete!")
+    if args.record:
+        db.close()
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,22 @@
+import argparse
+from remote_evaluation import WorkerServer, DEFAULT_PORT
+
+def main():
+    parser = argparse.ArgumentParser(description='Fitness evaluation worker for main.py --remote-workers')
+    parser.add_argument('--host', default='0.0.0.0', help='Address to listen on (default: all interfaces)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--scalar', action='store_true', help='Simulate one snake at a time instead of the whole batch in lockstep (same results, slower)')
+    args = parser.parse_args()
+
+    # Mỗi worker dùng một lõi CPU: chạy nhiều worker (mỗi cái một cổng) trên máy nhiều lõi
+    server = WorkerServer((args.host, args.port), batched=not args.scalar)
+    print(f"Evaluation worker listening on {args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nWorker stopped.")
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
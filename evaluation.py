@@ -0,0 +1,41 @@
+import multiprocessing
+from snake import Snake
+from neural_network import NeuralNetwork
+from game import run_simulation
+
+def evaluate_genome(genome, layer_sizes, seed):
+    """Chạy một lượt chơi (không hiển thị) cho bộ gen đã đóng gói và trả về (fitness, score, steps)."""
+    brain = NeuralNetwork.from_genome(genome, *layer_sizes)
+    return run_simulation(Snake(brain=brain), display=False, seed=seed)
+
+def _evaluate_chunk(task):
+    genomes, seeds, layer_sizes = task
+    return [evaluate_genome(genome, layer_sizes, seed) for genome, seed in zip(genomes, seeds)]
+
+class ParallelEvaluator:
+    """Đánh giá fitness trên một pool tiến trình.
+
+    Bộ gen được gửi đi dưới dạng ma trận NumPy (mỗi hàng một cá thể) thay vì các đối
+    tượng Snake. Quần thể được chia thành nhiều khối nhỏ (chunks_per_worker khối cho mỗi
+    worker) để cân bằng tải khi độ dài các lượt chơi chênh lệch nhiều; kết quả trả về
+    đúng thứ tự quần thể.
+    """
+    def __init__(self, workers, chunks_per_worker=8):
+        self.workers = workers
+        self.chunks_per_worker = chunks_per_worker
+        self.pool = multiprocessing.Pool(workers)
+
+    def evaluate(self, genomes, seeds, layer_sizes):
+        chunk_size = max(1, -(-len(genomes) // (self.workers * self.chunks_per_worker)))
+        tasks = [(genomes[i:i + chunk_size], seeds[i:i + chunk_size], layer_sizes)
+                 for i in range(0, len(genomes), chunk_size)]
+        results = []
+        for chunk_results in self.pool.imap(_evaluate_chunk, tasks):
+            results.extend(chunk_results)
+        return results
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
@@ -0,0 +1,45 @@
+import hashlib
+from collections import OrderedDict
+
+def genome_digest(genome):
+    """Mã băm 16 byte của bộ gen (theo byte thô, nên hai bộ gen giống hệt nhau cho cùng mã)."""
+    return hashlib.blake2b(genome.tobytes(), digest_size=16).digest()
+
+def episode_seed(digest, salt):
+    """Seed lượt chơi suy ra từ bộ gen: cùng bộ gen luôn chơi cùng một ván trong một lần huấn luyện."""
+    return int.from_bytes(hashlib.blake2b(digest, digest_size=4, key=salt.to_bytes(8, 'little')).digest(), 'little')
+
+
+class FitnessCache:
+    """Bộ nhớ đệm kết quả (fitness, score, steps) theo khoá (mã băm bộ gen, seed).
+
+    Giới hạn max_size phần tử, bỏ phần tử lâu không dùng nhất (LRU) khi đầy. Đếm số
+    lần trúng/trượt để biết bộ đệm tiết kiệm được bao nhiêu lượt mô phỏng.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
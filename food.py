@@ -1,23 +1,30 @@
-import pygame
 import random
 from constants import *
+from grid import OccupancyGrid
 
 class Food:
-    def __init__(self):
+    def __init__(self, rng=None):
         self.position = (0, 0)
         self.color = RED
+        # Bộ sinh số ngẫu nhiên riêng (random.Random) để tái lập được chuỗi vị trí mồi
+        self.rng = rng if rng is not None else random
         self.randomize_position([]) # Khởi tạo vị trí ban đầu
 
     def randomize_position(self, snake_positions):
+        if isinstance(snake_positions, OccupancyGrid):
+            # Chọn thẳng một ô trong danh sách ô trống của lưới: O(1) dù rắn dài bao nhiêu
+            if snake_positions.free_count:
+                cell = self.pick_free_cell(snake_positions.free_cells, snake_positions.free_count)
+                self.position = snake_positions.position(cell)
+            return
+
         while True:
-            self.position = (random.randint(0, GRID_WIDTH - 1),
-                             random.randint(0, GRID_HEIGHT - 1))
+            self.position = (self.rng.randint(0, GRID_WIDTH - 1),
+                             self.rng.randint(0, GRID_HEIGHT - 1))
             # Đảm bảo thức ăn không xuất hiện trên thân rắn
             if self.position not in snake_positions:
                 break
 
-    def draw(self, surface):
-        rect = pygame.Rect(self.position[0] * GRID_SIZE, self.position[1] * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-        pygame.draw.rect(surface, self.color, rect)
-        inner_rect = pygame.Rect(self.position[0] * GRID_SIZE + 2, self.position[1] * GRID_SIZE + 2, GRID_SIZE - 4, GRID_SIZE - 4)
-        pygame.draw.rect(surface, (255,100,100), inner_rect) # Màu trong nhạt hơn
\ No newline at end of file
+    def pick_free_cell(self, free_cells, free_count):
+        # Dùng chung cho lưới của Snake và bản NumPy trong batch_game để cùng seed cho cùng mồi
+        return free_cells[self.rng.randrange(free_count)]
\ No newline at end of file
@@ -1,22 +1,48 @@
-import pygame
 from snake import Snake
 from food import Food
 from constants import *
+import random
 import sys
 
-def run_simulation(snake_agent, display=False):
-    """Chạy một lượt chơi cho một con rắn và trả về fitness của nó."""
-    pygame.init()
+def start_episode(snake, seed=None):
+    """Chuẩn bị thức ăn cho một lượt chơi mới.
+
+    Nếu có `seed`, hướng ban đầu của rắn và chuỗi vị trí mồi được lấy từ một
+    random.Random(seed) riêng, nên cùng seed luôn cho cùng một lượt chơi.
+    """
+    rng = None
+    if seed is not None:
+        rng = random.Random(seed)
+        snake.direction = rng.choice([UP, DOWN, LEFT, RIGHT])
+    food = Food(rng=rng)
+    food.randomize_position(snake.body_grid)
+    return food
+
+def run_simulation(snake_agent, display=False, seed=None, recording=None, actions=None, fps=FPS):
+    """Chạy một lượt chơi cho một con rắn và trả về fitness của nó.
+
+    `recording` (recording.Episode): ghi seed và mọi hành động của lượt chơi vào đó; nếu
+    không có seed, một seed ngẫu nhiên được rút ra để lượt chơi luôn phát lại được.
+    `actions`: chuỗi hành động đã ghi (0=trái, 1=thẳng, 2=phải); khi có, rắn đi theo đó
+    thay vì hỏi mạng nơ-ron (phát lại). `fps`: tốc độ hiển thị, 0 là tua nhanh không giới hạn.
+    """
+    if recording is not None and seed is None:
+        seed = random.getrandbits(32)
     screen = None
     clock = None
     if display:
-        screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption(f'Snake AI Simulation')
+        # Chỉ nạp pygame khi cần hiển thị, chế độ huấn luyện không động tới SDL
+        import pygame
+        import render
+        screen = render.open_window('Snake AI Simulation')
+        renderer = render.BoardRenderer(screen)
         clock = pygame.time.Clock()
 
     snake = snake_agent # Snake đã có brain từ trước
-    food = Food()
-    food.randomize_position(snake.positions)
+    food = start_episode(snake, seed)
+    step_index = 0
+    if display:
+        renderer.reset(snake, food)
 
     while snake.alive:
         if display:
@@ -26,28 +52,33 @@ def run_simulation(snake_agent, display=False):
                     sys.exit()
 
             # Giảm tốc độ để xem
-            clock.tick(FPS)
-
-        # Lấy toàn bộ body của rắn (để kiểm tra va chạm trong get_inputs)
-        # Trong trường hợp này chỉ có 1 rắn, nên truyền body của chính nó
-        all_bodies = [snake.positions]
+            clock.tick(fps)
 
-        # Rắn tự di chuyển dựa trên não của nó
-        snake.move(food.position, all_bodies)
+        # Rắn tự di chuyển dựa trên não của nó (hoặc theo bản ghi khi phát lại)
+        if actions is not None:
+            if step_index >= len(actions):
+                raise ValueError(f"Recording ended after {len(actions)} actions but the snake is still alive")
+            decision = actions[step_index]
+            step_index += 1
+        else:
+            decision = snake.decide(food.position) # Chỉ có 1 rắn: cảm biến dùng thân của chính nó
+        if recording is not None:
+            recording.actions.append(decision)
+        snake.step(decision, food.position)
 
         # Kiểm tra ăn mồi
         if snake.get_head_position() == food.position:
-            food.randomize_position(snake.positions)
+            food.randomize_position(snake.body_grid)
             # Không cần tăng score ở đây vì đã làm trong snake.move
 
-        if display:
-            screen.fill(BLACK)
-            snake.draw(screen)
-            food.draw(screen)
-            pygame.display.flip()
+        if display and snake.alive:
+            # Chỉ vẽ lại các ô thay đổi
+            renderer.update(snake, food)
 
     # Kết thúc game, tính toán fitness
     snake.calculate_fitness()
+    if recording is not None:
+        recording.finish(seed, snake)
     if display:
         print(f"Game Over! Score: {snake.score}, Steps: {snake.steps_taken}, Fitness: {snake.fitness:.2f}")
         pygame.time.wait(1000) # Chờ xem điểm cuối
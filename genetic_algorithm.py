@@ -1,13 +1,20 @@
 import numpy as np
-import random
 from snake import Snake # Cần để tạo cá thể rắn
-from neural_network import NeuralNetwork
+from neural_network import NeuralNetwork, PopulationNetwork, crossover_segments, random_genomes
 from game import run_simulation # Để chạy mô phỏng và lấy fitness
+from batch_game import run_batch_simulation # Mô phỏng cả quần thể bằng NumPy
+from arena import run_arena # Nhiều con rắn trên một bàn cờ chung
+from evaluation import ParallelEvaluator # Đánh giá trên nhiều tiến trình
+from remote_evaluation import RemoteEvaluator # Đánh giá trên các worker từ xa qua TCP
 from constants import *
 from database import Database  # Import Database class
+from checkpoint import save_checkpoint, load_checkpoint # Lưu/khôi phục toàn bộ quần thể
+from fitness_cache import FitnessCache, genome_digest, episode_seed # Không mô phỏng lại bộ gen đã gặp
+from timing import PhaseTimer # Thời gian từng giai đoạn của mỗi thế hệ
+from recording import record_episode # Ghi lượt chơi (seed + hành động) để phát lại
 
 class GeneticAlgorithm:
-    def __init__(self, population_size, mutation_rate, input_nodes, hidden_nodes, output_nodes, use_database=True, load_from_session=None):
+    def __init__(self, population_size, mutation_rate, input_nodes, hidden_nodes, output_nodes, use_database=True, load_from_session=None, batched=False, workers=1, seed=None, db_flush_interval=1, checkpoint_path=None, checkpoint_interval=10, resume_from=None, fitness_cache_size=0, viewer=None, record_episodes=False, remote_workers=None, remote_timeout=60.0, arena_size=0, arena_kill_bonus=0):
         self.population_size = population_size
         self.mutation_rate = mutation_rate
         self.input_nodes = input_nodes
@@ -17,13 +24,50 @@ class GeneticAlgorithm:
         self.best_fitness = 0
         self.avg_fitness = 0
         self.best_snake_brain = None # Lưu não của con rắn tốt nhất
+        self.fitness_scores = np.zeros(population_size) # Fitness của thế hệ vừa đánh giá
+        self.total_steps = 0 # Tổng số bước của mọi lượt chơi trong thế hệ vừa đánh giá
+        self.evaluated_genomes = None # Quần thể ứng với fitness_scores (thế hệ vừa đánh giá)
+        self.timer = PhaseTimer()
+        self.checkpoint_path = checkpoint_path # Ghi checkpoint mỗi checkpoint_interval thế hệ
+        self.checkpoint_interval = checkpoint_interval
+        self.last_checkpoint_generation = None
+        self.batched = batched # Đánh giá cả quần thể cùng lúc bằng run_batch_simulation
+        self.evaluator = ParallelEvaluator(workers) if workers > 1 else None
+        # Worker từ xa (eval_worker.py, danh sách 'host:port'): được ưu tiên hơn mọi cách đánh giá tại chỗ
+        self.remote_evaluator = RemoteEvaluator(remote_workers, timeout=remote_timeout) if remote_workers else None
+        # Đấu trường: arena_size con rắn chơi chung một bàn cờ, fitness phụ thuộc cả đối thủ
+        self.arena_size = arena_size
+        self.arena_kill_bonus = arena_kill_bonus
+        self.viewer = viewer # viewer.Viewer: hiển thị trong tiến trình riêng, không chặn huấn luyện
+        self.record_episodes = record_episodes # Ghi lượt chơi của con tốt nhất mỗi thế hệ vào database
+
+        # Một bộ sinh số ngẫu nhiên duy nhất cho mọi thao tác của GA; cố định seed để có thể
+        # tái lập toàn bộ quá trình huấn luyện
+        self.rng = np.random.default_rng(seed)
+
+        # Bộ đệm fitness (tuỳ chọn). Khi bật, seed lượt chơi được suy ra từ chính bộ gen và
+        # cache_salt, nên con tinh hoa và những con giống hệt bố/mẹ cho đúng kết quả cũ
+        # và không cần mô phỏng lại.
+        if fitness_cache_size > 0 and arena_size:
+            raise ValueError("The fitness cache cannot be used with arena evaluation: a genome's fitness depends on its opponents")
+        if record_episodes and arena_size:
+            # record_episode chơi lại một mình trên bàn cờ thường, không phải ván đấu trường đã cho fitness đó
+            raise ValueError("Episodes cannot be recorded with arena evaluation: a replay would not be the arena game")
+        self.fitness_cache = FitnessCache(fitness_cache_size) if fitness_cache_size > 0 else None
+        self.cache_salt = int(self.rng.integers(0, 2**63)) if self.fitness_cache is not None else None
         
         # Database integration
         self.use_database = use_database
-        self.db = Database() if use_database else None
+        # Generation results are written behind by a background thread, one transaction
+        # every db_flush_interval generations
+        self.db = Database(write_behind=True, flush_every=db_flush_interval) if use_database else None
         self.session_id = None
         
-        if use_database:
+        if resume_from:
+            # Tiếp tục đúng chỗ đã dừng: quần thể, fitness, bộ đếm thế hệ và trạng thái RNG
+            self.load_checkpoint(resume_from)
+            print(f"Resumed from checkpoint {resume_from} at generation {self.generation}")
+        elif use_database:
             if load_from_session:
                 # Load the best neural network from a specific session
                 self.best_snake_brain = self.db.load_best_neural_network(load_from_session)
@@ -35,146 +79,263 @@ class GeneticAlgorithm:
                     self.best_snake_brain = best_network
                     print("Loaded best neural network from previous sessions")
             
+        if use_database and not self.session_id:
             # Start a new database session
             self.session_id = self.db.start_new_session(
-                population_size, mutation_rate, input_nodes, hidden_nodes, output_nodes
+                self.population_size, mutation_rate, input_nodes, hidden_nodes, output_nodes
             )
             print(f"Started new training session with ID: {self.session_id}")
         
-        # Initialize population
-        self.population = self._initialize_population()
+        if not resume_from:
+            # Initialize population: ma trận (population_size, genome_length), mỗi hàng một cá thể
+            self.genomes = self._initialize_population()
 
     def _initialize_population(self):
-        population = []
+        genomes = random_genomes(self.rng, self.population_size,
+                                 self.input_nodes, self.hidden_nodes, self.output_nodes)
         
         # If we have a best brain from database, use it for one individual
         if self.best_snake_brain:
             # Add the best brain to the population
-            population.append(Snake(brain=self.best_snake_brain.clone()))
+            genomes[0] = self.best_snake_brain.genome
             print("Using best neural network from database for one individual")
             
             # Create the rest with mutations from the best brain
-            for _ in range(self.population_size // 4 - 1):  # 25% of population are mutations of best
-                mutated_brain = self.best_snake_brain.clone()
-                mutated_brain.mutate(self.mutation_rate * 2)  # Higher mutation rate for diversity
-                population.append(Snake(brain=mutated_brain))
+            num_mutants = self.population_size // 4 - 1  # 25% of population are mutations of best
+            genomes[1:1 + num_mutants] = self.best_snake_brain.genome
+            self._mutate(genomes[1:1 + num_mutants], self.mutation_rate * 2)  # Higher mutation rate for diversity
             
-            # Create the rest randomly
-            for _ in range(self.population_size - len(population)):
-                brain = NeuralNetwork(self.input_nodes, self.hidden_nodes, self.output_nodes)
-                population.append(Snake(brain=brain))
-        else:
-            # No best brain, initialize randomly
-            for _ in range(self.population_size):
-                brain = NeuralNetwork(self.input_nodes, self.hidden_nodes, self.output_nodes)
-                population.append(Snake(brain=brain))
+            # The rest stay random
                 
-        return population
+        return genomes
 
-    def run_generation(self, display_best=False):
-        """Chạy một thế hệ của GA."""
+    def _make_snake(self, genome):
+        # Rắn dùng trực tiếp hàng của ma trận làm não (view, không sao chép)
+        brain = NeuralNetwork.from_genome(genome, self.input_nodes, self.hidden_nodes, self.output_nodes)
+        return Snake(brain=brain, copy_brain=False)
+
+    def run_generation(self, display_best=False, checkpoint=True):
+        """Chạy một thế hệ của GA.
+
+        checkpoint=False: không ghi checkpoint định kỳ (người gọi tự ghi sau khi sửa quần thể mới,
+        như mô hình đảo sau khi nhận bộ gen di cư).
+        """
         self.generation += 1
-        fitness_scores = []
-        total_fitness = 0
-        max_fitness_this_gen = 0
-        best_snake_this_gen = None
+        self.timer.reset()
 
         print(f"\n--- Generation {self.generation} ---")
 
         # 1. Đánh giá (Evaluation) - Chạy mô phỏng cho từng cá thể
-        for i, snake in enumerate(self.population):
-            # Chạy mô phỏng không hiển thị để tăng tốc độ huấn luyện
-            fitness, score, steps = run_simulation(snake, display=False) # display=False
-            snake.fitness = fitness # Gán fitness cho đối tượng rắn
-            fitness_scores.append(fitness)
-            total_fitness += fitness
-
-            if fitness > max_fitness_this_gen:
-                max_fitness_this_gen = fitness
-                best_snake_this_gen = snake
-                # Chỉ lưu lại não nếu nó tốt hơn con tốt nhất từ trước đến giờ
-                if fitness > self.best_fitness:
-                     self.best_fitness = fitness
-                     self.best_snake_brain = snake.brain.clone() # Lưu bản sao não tốt nhất
-
-            # In tiến trình (tuỳ chọn)
-            print(f"\rEvaluating individual {i+1}/{self.population_size}...", end="")
+        layer_sizes = (self.input_nodes, self.hidden_nodes, self.output_nodes)
+        with self.timer.phase('evaluation'):
+            if self.fitness_cache is not None:
+                digests = [genome_digest(genome) for genome in self.genomes]
+                seeds = [episode_seed(digest, self.cache_salt) for digest in digests]
+                results = self._evaluate_cached(self.genomes, digests, seeds)
+            else:
+                # Mỗi cá thể có seed riêng cho lượt chơi, nên kết quả không phụ thuộc cách đánh giá
+                seeds = self.rng.integers(0, 2**32, size=self.population_size).tolist()
+                results = self._evaluate(self.genomes, seeds)
         print("\nEvaluation complete.")
 
+        fitness_scores = np.array([fitness for fitness, score, steps in results])
+        self.fitness_scores = fitness_scores
+        self.total_steps = sum(steps for fitness, score, steps in results)
+        total_fitness = fitness_scores.sum()
+        best_index_this_gen = int(np.argmax(fitness_scores))
+        max_fitness_this_gen = fitness_scores[best_index_this_gen]
+        # Chỉ lưu lại não nếu nó tốt hơn con tốt nhất từ trước đến giờ
+        if max_fitness_this_gen > self.best_fitness:
+            self.best_fitness = max_fitness_this_gen
+            self.best_snake_brain = NeuralNetwork.from_genome(self.genomes[best_index_this_gen].copy(), *layer_sizes) # Lưu bản sao não tốt nhất
+
         self.avg_fitness = total_fitness / self.population_size
         print(f"Max Fitness: {max_fitness_this_gen:.2f}, Avg Fitness: {self.avg_fitness:.2f}")
         print(f"Overall Best Fitness: {self.best_fitness:.2f}")
 
-        # Save generation stats and best brain to database
+        # Save best brain and session progress to database
         if self.use_database and self.session_id:
-            # Save generation statistics
-            self.db.save_generation_stats(
-                self.session_id, 
-                self.generation, 
-                max_fitness_this_gen, 
-                self.avg_fitness
-            )
-            
-            # Save best snake's brain from this generation
-            if best_snake_this_gen:
+            with self.timer.phase('database'):
+                # Save best snake's brain from this generation
                 self.db.save_neural_network(
                     self.session_id,
                     self.generation,
                     max_fitness_this_gen,
-                    best_snake_this_gen.brain
+                    NeuralNetwork.from_genome(self.genomes[best_index_this_gen], *layer_sizes)
                 )
-            
-            # Update session with current stats
-            self.db.update_session(
-                self.session_id,
-                self.generation,
-                self.best_fitness,
-                self.avg_fitness
-            )
 
-        # 2. Lựa chọn (Selection) - Chọn các cá thể tốt để lai ghép
-        new_population = []
+                # Update session with current stats
+                self.db.update_session(
+                    self.session_id,
+                    self.generation,
+                    self.best_fitness,
+                    self.avg_fitness
+                )
 
-        # Giữ lại con tốt nhất (Elitism) - tùy chọn nhưng thường hiệu quả
-        if self.best_snake_brain:
-             best_individual = Snake(brain=self.best_snake_brain.clone()) # Tạo rắn mới từ não tốt nhất
-             new_population.append(best_individual)
+            if self.record_episodes:
+                # Chơi lại đúng lượt của con tốt nhất (cùng seed) và lưu lại để phát lại sau;
+                # giai đoạn riêng để thời gian chơi lại không bị tính vào database_seconds
+                with self.timer.phase('recording'):
+                    episode = record_episode(NeuralNetwork.from_genome(self.genomes[best_index_this_gen], *layer_sizes),
+                                             seeds[best_index_this_gen])
+                with self.timer.phase('database'):
+                    self.db.save_episode(self.session_id, self.generation, episode)
+
+        try:
+            # 2-4. Lựa chọn, lai ghép, đột biến (giữ lại quần thể vừa đánh giá cho top_genomes)
+            self.evaluated_genomes = self.genomes
+            self.genomes = self._reproduce(fitness_scores)
 
+            if checkpoint and self.checkpoint_due():
+                self.save_checkpoint()
 
-        # Chọn phần còn lại dựa trên fitness (ví dụ: Tournament Selection)
-        num_to_select = self.population_size - len(new_population) # Số lượng cần chọn thêm
-        for _ in range(num_to_select):
-            parent1 = self._tournament_selection(self.population, fitness_scores)
-            parent2 = self._tournament_selection(self.population, fitness_scores)
+            # (Tuỳ chọn) Hiển thị con rắn tốt nhất của thế hệ này
+            if display_best and self.best_snake_brain:
+                with self.timer.phase('display'):
+                    if self.viewer:
+                        # Chỉ gửi bộ gen đi, tiến trình hiển thị tự chơi
+                        self.viewer.show(self.best_snake_brain.genome, self.generation, self.best_fitness)
+                    else:
+                        print("Displaying best snake of the generation...")
+                        best_performer = Snake(brain=self.best_snake_brain.clone()) # Dùng não tốt nhất đã lưu
+                        run_simulation(best_performer, display=True)
+        finally:
+            # Thống kê thế hệ được ghi sau cùng để có đủ thời gian mọi giai đoạn (kể cả khi
+            # cửa sổ hiển thị bị đóng giữa chừng)
+            timings = self.generation_timings()
+            print("Timings: " + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.timer.seconds.items())
+                  + f" | {self.total_steps} steps ({timings['steps_per_second']:.0f} steps/s)")
+            if self.use_database and self.session_id:
+                self.db.save_generation_stats(
+                    self.session_id,
+                    self.generation,
+                    max_fitness_this_gen,
+                    self.avg_fitness,
+                    timings
+                )
+                self.db.end_generation()
 
+    def generation_timings(self):
+        """Thời gian từng giai đoạn của thế hệ vừa chạy, theo tên cột của generation_stats."""
+        seconds = self.timer.seconds
+        timings = {f'{phase}_seconds': seconds.get(phase, 0.0)
+                   for phase in ('evaluation', 'selection', 'crossover', 'database', 'display')}
+        timings['total_steps'] = int(self.total_steps)
+        evaluation = seconds.get('evaluation', 0.0)
+        timings['steps_per_second'] = self.total_steps / evaluation if evaluation else 0.0
+        return timings
+
+    def top_genomes(self, count):
+        """Bản sao `count` bộ gen tốt nhất của thế hệ vừa đánh giá, tốt nhất trước (để di cư)."""
+        best = np.argsort(self.fitness_scores)[::-1][:count]
+        return self.evaluated_genomes[best].copy()
+
+    def receive_migrants(self, genomes):
+        """Thay các con cuối của thế hệ mới (thứ tự ngẫu nhiên, không đụng con tinh hoa ở hàng 0) bằng `genomes`."""
+        count = min(len(genomes), self.population_size - 1)
+        if count > 0:
+            self.genomes[self.population_size - count:] = genomes[:count]
+
+    def _reproduce(self, fitness_scores):
+        """Tạo ma trận bộ gen của thế hệ mới từ quần thể hiện tại và fitness của nó."""
+        # 2. Lựa chọn (Selection) - Chọn các cá thể tốt để lai ghép
+        # Giữ lại con tốt nhất (Elitism) - tùy chọn nhưng thường hiệu quả
+        num_elite = 1 if self.best_snake_brain else 0
+
+        # Chọn phần còn lại dựa trên fitness (Tournament Selection), cho cả thế hệ một lúc
+        num_to_select = self.population_size - num_elite # Số lượng cần chọn thêm
+        with self.timer.phase('selection'):
+            parents1 = self._tournament_selection(fitness_scores, num_to_select)
+            parents2 = self._tournament_selection(fitness_scores, num_to_select)
+
+        with self.timer.phase('crossover'):
             # 3. Lai ghép (Crossover)
-            child_brain = parent1.brain.crossover(parent2.brain)
+            children = self._crossover(self.genomes[parents1], self.genomes[parents2])
 
             # 4. Đột biến (Mutation)
-            child_brain.mutate(self.mutation_rate)
+            self._mutate(children, self.mutation_rate)
+
+        new_genomes = np.empty_like(self.genomes)
+        if num_elite:
+            new_genomes[0] = self.best_snake_brain.genome
+        new_genomes[num_elite:] = children
+        return new_genomes
 
-            new_population.append(Snake(brain=child_brain))
+    def _evaluate(self, genomes, seeds):
+        """Chạy một lượt chơi cho mỗi hàng của `genomes`, trả về danh sách (fitness, score, steps)."""
+        layer_sizes = (self.input_nodes, self.hidden_nodes, self.output_nodes)
+        if self.arena_size:
+            # Các nhóm arena_size hàng liên tiếp, mỗi nhóm một đấu trường với seed của hàng đầu tiên
+            print(f"Evaluating population in arenas of {self.arena_size}...", end="")
+            results = []
+            for start in range(0, len(genomes), self.arena_size):
+                group = genomes[start:start + self.arena_size]
+                snakes = [Snake(random_brain=False) for _ in range(len(group))]
+                results.extend(run_arena(snakes, seeds[start], brains=PopulationNetwork(group, *layer_sizes),
+                                         kill_bonus=self.arena_kill_bonus))
+            return results
+        if self.remote_evaluator:
+            print(f"Evaluating population on {self.remote_evaluator.workers} remote workers...", end="")
+            return self.remote_evaluator.evaluate(genomes, seeds, layer_sizes)
+        if self.batched:
+            print("Evaluating population in lockstep...", end="")
+            snakes = [self._make_snake(genome) for genome in genomes]
+            return run_batch_simulation(snakes, seeds, brains=PopulationNetwork(genomes, *layer_sizes))
+        if self.evaluator:
+            print(f"Evaluating population on {self.evaluator.workers} workers...", end="")
+            return self.evaluator.evaluate(genomes, seeds, layer_sizes)
+        results = []
+        for i, genome in enumerate(genomes):
+            # Chạy mô phỏng không hiển thị để tăng tốc độ huấn luyện
+            results.append(run_simulation(self._make_snake(genome), display=False, seed=seeds[i])) # display=False
+            # In tiến trình (tuỳ chọn)
+            print(f"\rEvaluating individual {i+1}/{len(genomes)}...", end="")
+        return results
 
+    def _evaluate_cached(self, genomes, digests, seeds):
+        """Như _evaluate nhưng lấy kết quả từ bộ đệm nếu có; chỉ mô phỏng các bộ gen chưa gặp."""
+        cache = self.fitness_cache
+        results = [None] * len(genomes)
+        pending = {} # khoá -> các vị trí cần kết quả (bộ gen trùng nhau chỉ chạy một lần)
+        for i, key in enumerate(zip(digests, seeds)):
+            if key in pending:
+                pending[key].append(i)
+                cache.hits += 1
+                continue
+            results[i] = cache.get(key)
+            if results[i] is None:
+                pending[key] = [i]
 
-        self.population = new_population
+        hits = len(genomes) - len(pending)
+        if pending:
+            keys = list(pending)
+            rows = [pending[key][0] for key in keys]
+            fresh = self._evaluate(genomes[rows], [seed for _, seed in keys])
+            for key, result in zip(keys, fresh):
+                cache.put(key, result)
+                for i in pending[key]:
+                    results[i] = result
+        print(f"\nFitness cache: {hits}/{len(genomes)} hits this generation, "
+              f"{cache.hit_rate():.1%} overall ({len(cache)} entries)", end="")
+        return results
 
-        # (Tuỳ chọn) Hiển thị con rắn tốt nhất của thế hệ này
-        if display_best and self.best_snake_brain:
-             print("Displaying best snake of the generation...")
-             best_performer = Snake(brain=self.best_snake_brain.clone()) # Dùng não tốt nhất đã lưu
-             run_simulation(best_performer, display=True)
+    def _tournament_selection(self, fitness_scores, count, k=5):
+        """Chọn `count` cá thể, mỗi cá thể là con tốt nhất trong một nhóm k ngẫu nhiên (trả về chỉ số)."""
+        selection_ix = self.rng.integers(len(fitness_scores), size=(count, k))
+        best = np.argmax(fitness_scores[selection_ix], axis=1)
+        return selection_ix[np.arange(count), best]
 
+    def _crossover(self, genomes1, genomes2):
+        """Lai ghép một điểm cho từng tham số (IH, HO, bias H, bias O) của mọi cặp bố mẹ."""
+        sizes, segment, position = crossover_segments(self.input_nodes, self.hidden_nodes, self.output_nodes)
+        mid_points = self.rng.integers(0, sizes, size=(len(genomes1), len(sizes)))
+        return np.where(position < mid_points[:, segment], genomes1, genomes2)
 
-    def _tournament_selection(self, population, fitness_scores, k=5):
-        """Chọn cá thể tốt nhất từ một nhóm ngẫu nhiên (k tournament size)."""
-        selection_ix = np.random.randint(len(population), size=k)
-        best_ix = -1
-        best_fitness = -1
-        for i in selection_ix:
-            if fitness_scores[i] > best_fitness:
-                best_fitness = fitness_scores[i]
-                best_ix = i
-        return population[best_ix]
+    def _mutate(self, genomes, mutation_rate):
+        """Đột biến tại chỗ: mỗi tham số bị cộng nhiễu nhỏ với xác suất mutation_rate."""
+        mask = self.rng.random(genomes.shape) < mutation_rate
+        noise = self.rng.standard_normal(genomes.shape, dtype=genomes.dtype) * 0.1 # Nhiễu nhỏ
+        genomes += mask * noise
 
     # Có thể thêm các phương thức lựa chọn khác như Roulette Wheel
 
@@ -194,7 +355,72 @@ class GeneticAlgorithm:
         else:
             print("Cannot save best brain: database not initialized or no best brain.")
     
+    def checkpoint_due(self):
+        """Thế hệ vừa chạy có phải lúc ghi checkpoint định kỳ không."""
+        return bool(self.checkpoint_path) and self.generation % self.checkpoint_interval == 0
+
+    def save_checkpoint(self, path=None):
+        """Ghi toàn bộ trạng thái GA (quần thể, fitness, thế hệ, RNG) ra file checkpoint."""
+        path = path or self.checkpoint_path
+        best_genome = self.best_snake_brain.genome if self.best_snake_brain else np.empty(0, dtype=self.genomes.dtype)
+        save_checkpoint(path, {
+            'genomes': self.genomes,
+            'fitness_scores': self.fitness_scores,
+            'best_genome': best_genome,
+        }, {
+            'generation': self.generation,
+            'best_fitness': float(self.best_fitness),
+            'avg_fitness': float(self.avg_fitness),
+            'mutation_rate': self.mutation_rate,
+            'layer_sizes': [self.input_nodes, self.hidden_nodes, self.output_nodes],
+            'session_id': self.session_id,
+            'rng_state': self.rng.bit_generator.state,
+            'cache_salt': self.cache_salt,
+        })
+        self.last_checkpoint_generation = self.generation
+        print(f"Checkpoint saved to {path} (generation {self.generation})")
+
+    def load_checkpoint(self, path):
+        """Khôi phục trạng thái đã lưu bởi save_checkpoint."""
+        arrays, meta = load_checkpoint(path)
+        if meta['layer_sizes'] != [self.input_nodes, self.hidden_nodes, self.output_nodes]:
+            raise ValueError(f"Checkpoint {path} has layer sizes {meta['layer_sizes']}")
+        self.genomes = np.array(arrays['genomes'])
+        self.fitness_scores = np.array(arrays['fitness_scores'])
+        self.population_size = len(self.genomes)
+        self.generation = meta['generation']
+        if meta['mutation_rate'] != self.mutation_rate:
+            # Tiếp tục đúng như lượt chạy đã lưu, kể cả khi MUTATION_RATE đã đổi
+            print(f"Using the checkpoint's mutation rate {meta['mutation_rate']} instead of {self.mutation_rate}")
+            self.mutation_rate = meta['mutation_rate']
+        self.best_fitness = meta['best_fitness']
+        self.avg_fitness = meta['avg_fitness']
+        if arrays['best_genome'].size:
+            self.best_snake_brain = NeuralNetwork.from_genome(np.array(arrays['best_genome']), *meta['layer_sizes'])
+        self.rng.bit_generator.state = meta['rng_state']
+        if meta.get('cache_salt') is not None:
+            self.cache_salt = meta['cache_salt']
+        self.last_checkpoint_generation = self.generation
+        # Tiếp tục ghi vào cùng phiên trong database
+        if self.use_database:
+            self.session_id = meta['session_id']
+
     def close_db(self):
         """Close database connection."""
         if self.db:
-            self.db.close()
\ No newline at end of file
+            self.db.close()
+
+    def close_viewer(self):
+        """Stop the viewer process, if any."""
+        if self.viewer:
+            self.viewer.close()
+            self.viewer = None
+
+    def close_workers(self):
+        """Shut down the evaluation process pool and remote worker connections, if any."""
+        if self.evaluator:
+            self.evaluator.close()
+            self.evaluator = None
+        if self.remote_evaluator:
+            self.remote_evaluator.close()
+            self.remote_evaluator = None
\ No newline at end of file
@@ -0,0 +1,48 @@
+from constants import *
+
+class OccupancyGrid:
+    """Lưới đánh dấu các ô đang bị chiếm (bytearray, mỗi ô một byte).
+
+    Được cập nhật dần khi thêm đầu/bỏ đuôi, nên kiểm tra một ô có bị chiếm hay
+    không luôn là O(1), bất kể thân rắn dài bao nhiêu. Vị trí truyền vào phải nằm
+    trong lưới (kiểm tra tường làm riêng).
+
+    Lưới cũng giữ danh sách các ô trống (free_cells[:free_count]) cùng chỉ số của
+    từng ô trong danh sách đó (free_index, -1 nếu ô đang bị chiếm). Chiếm một ô thì
+    đổi chỗ nó với phần tử cuối rồi bỏ đi, giải phóng thì thêm vào cuối, nên chọn
+    ngẫu nhiên một ô trống (Food.randomize_position) cũng là O(1).
+    """
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, positions=()):
+        self.width = width
+        self.height = height
+        self.cells = bytearray(width * height)
+        self.free_cells = list(range(width * height))
+        self.free_index = list(range(width * height))
+        self.free_count = width * height
+        for pos in positions:
+            self.add(pos)
+
+    def position(self, cell):
+        # Chỉ số ô (y * width + x) -> (x, y) theo kích thước của chính lưới này
+        return (cell % self.width, cell // self.width)
+
+    def __contains__(self, pos):
+        return self.cells[pos[1] * self.width + pos[0]] != 0
+
+    def add(self, pos):
+        cell = pos[1] * self.width + pos[0]
+        self.cells[cell] = 1
+        # Bỏ ô khỏi danh sách ô trống: đổi chỗ với ô trống cuối cùng
+        idx = self.free_index[cell]
+        self.free_count -= 1
+        last = self.free_cells[self.free_count]
+        self.free_cells[idx] = last
+        self.free_index[last] = idx
+        self.free_index[cell] = -1
+
+    def remove(self, pos):
+        cell = pos[1] * self.width + pos[0]
+        self.cells[cell] = 0
+        self.free_cells[self.free_count] = cell
+        self.free_index[cell] = self.free_count
+        self.free_count += 1
@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import json
+from collections import OrderedDict
+import numpy as np
+from database import load_best_network_readonly
+
+# Giao thức: mỗi dòng một đối tượng JSON (UTF-8), trên một kết nối TCP có thể gửi nhiều
+# yêu cầu liên tiếp mà không chờ (câu trả lời mang lại "id" của yêu cầu):
+#   {"id": 1, "session_id": 3, "inputs": [8 số, như Snake.get_inputs]} -> {"id": 1, "action": 0|1|2}
+#   session_id bỏ trống: mạng tốt nhất của mọi phiên
+#   {"id": 2, "stats": true} -> số yêu cầu, số lô, kích thước lô trung bình, bộ đệm mô hình
+#   lỗi -> {"id": ..., "error": "..."}
+DEFAULT_PORT = 5858
+
+
+class MicroBatcher:
+    """Gộp các yêu cầu đồng thời cho một mạng thành một lần feedforward theo lô.
+
+    Yêu cầu đầu tiên của một lô hẹn giờ `window` giây; mọi yêu cầu tới trong khoảng đó
+    (hoặc cho tới khi đủ max_batch) được xếp thành một ma trận và tính bằng
+    NeuralNetwork.decide_batch, cho đúng hành động như feedforward từng cái.
+    """
+    def __init__(self, network, window=0.002, max_batch=256, counters=None):
+        self.network = network
+        self.window = window
+        self.max_batch = max_batch
+        self.pending = [] # (inputs, future)
+        self.timer = None
+        # Số lô và số yêu cầu đã tính, có thể dùng chung cho mọi mạng (ModelCache.counters)
+        self.counters = counters if counters is not None else {'batches': 0, 'requests': 0}
+
+    def submit(self, inputs):
+        if len(inputs) != self.network.input_nodes:
+            raise ValueError(f"Expected {self.network.input_nodes} inputs, got {len(inputs)}")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((inputs, future))
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        actions = self.network.decide_batch(np.array([inputs for inputs, _ in batch], dtype=float))
+        for (_, future), action in zip(batch, actions.tolist()):
+            if not future.done(): # Client đã ngắt kết nối thì future bị huỷ
+                future.set_result(action)
+        self.counters['batches'] += 1
+        self.counters['requests'] += len(batch)
+
+
+class ModelCache:
+    """Bộ đệm LRU các mạng (mỗi mạng kèm một MicroBatcher) theo session_id.
+
+    Mạng được nạp bằng load_best_network_readonly (chỉ đọc, không sửa file database đang
+    phục vụ) trong một luồng riêng để không chặn vòng lặp sự kiện; nhiều yêu cầu cùng chờ
+    một phiên chưa nạp chỉ gây một lần nạp.
+    """
+    def __init__(self, db_name="snake_training.db", max_models=8, window=0.002, max_batch=256):
+        self.db_name = db_name
+        self.max_models = max_models
+        self.window = window
+        self.max_batch = max_batch
+        self.models = OrderedDict() # session_id -> MicroBatcher
+        self.loading = {} # session_id -> asyncio.Future đang nạp
+        self.counters = {'batches': 0, 'requests': 0}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _load(self, session_id):
+        # Chạy trong luồng phụ: kết nối SQLite chỉ dùng được trong luồng đã tạo nó
+        return load_best_network_readonly(self.db_name, session_id)
+
+    async def get(self, session_id):
+        batcher = self.models.get(session_id)
+        if batcher is not None:
+            self.models.move_to_end(session_id)
+            self.hits += 1
+            return batcher
+        if session_id in self.loading:
+            self.hits += 1
+            return await asyncio.shield(self.loading[session_id])
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.loading[session_id] = future
+        try:
+            network = await asyncio.to_thread(self._load, session_id)
+            if network is None:
+                raise LookupError(f"No neural network found for session {session_id}")
+            batcher = MicroBatcher(network, self.window, self.max_batch, self.counters)
+            self.models[session_id] = batcher
+            while len(self.models) > self.max_models:
+                # Lô đang chờ của mạng bị bỏ vẫn được tính khi hết hẹn giờ
+                self.models.popitem(last=False)
+                self.evictions += 1
+            future.set_result(batcher)
+            return batcher
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() # Những yêu cầu khác đang chờ sẽ nhận lỗi; không cảnh báo nếu không có ai
+            raise
+        finally:
+            del self.loading[session_id]
+
+
+class InferenceServer:
+    """Máy chủ asyncio trả về hành động của các mạng đã lưu (xem giao thức ở đầu file)."""
+    def __init__(self, cache):
+        self.cache = cache
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    def stats(self):
+        requests, batches = self.cache.counters['requests'], self.cache.counters['batches']
+        return {
+            'requests': requests,
+            'batches': batches,
+            'mean_batch_size': requests / batches if batches else 0.0,
+            'models': len(self.cache.models),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'cache_evictions': self.cache.evictions,
+        }
+
+    async def _handle(self, reader, writer):
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # Mỗi yêu cầu một task: các yêu cầu trên cùng kết nối được gộp lô cùng nhau
+                task = asyncio.create_task(self._answer(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, ValueError): # ValueError: dòng quá dài
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _answer(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            request_id = request.get('id')
+            if request.get('stats'):
+                response = self.stats()
+            else:
+                inputs = request.get('inputs')
+                if not isinstance(inputs, list) or not all(isinstance(x, (int, float)) for x in inputs):
+                    raise ValueError("'inputs' must be a list of numbers")
+                session_id = request.get('session_id')
+                if session_id is not None and (not isinstance(session_id, int) or isinstance(session_id, bool)):
+                    raise ValueError("'session_id' must be an integer or null")
+                batcher = await self.cache.get(session_id)
+                response = {'action': await batcher.submit(inputs)}
+        except Exception as e:
+            # Mọi yêu cầu đều nhận một dòng trả lời, kể cả khi lỗi database
+            response = {'error': str(e) or type(e).__name__}
+        if request_id is not None:
+            response['id'] = request_id
+        if writer.is_closing():
+            return
+        writer.write((json.dumps(response) + '\n').encode())
+        await writer.drain()
+
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, db_name="snake_training.db", max_models=8, window=0.002,
+                max_batch=256, ready=None):
+    """Chạy máy chủ cho tới khi bị huỷ; `ready` (tuỳ chọn) là Event được set khi đã sẵn sàng nhận kết nối."""
+    server = InferenceServer(ModelCache(db_name, max_models, window, max_batch))
+    await server.start(host, port)
+    if ready is not None:
+        ready.set()
+    async with server.server:
+        await server.server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the moves of trained snakes over TCP (one JSON request per line)')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--db', default='snake_training.db', help='Database to load networks from')
+    parser.add_argument('--cache-size', type=int, default=8, help='Number of networks kept in memory (default: 8)')
+    parser.add_argument('--batch-window-ms', type=float, default=2.0, help='How long a request may wait for others to share its forward pass (default: 2)')
+    parser.add_argument('--max-batch', type=int, default=256, help='Run the forward pass as soon as this many requests are waiting (default: 256)')
+    args = parser.parse_args()
+
+    print(f"Inference server listening on {args.host}:{args.port}")
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.cache_size, args.batch_window_ms / 1000, args.max_batch))
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import traceback
+import numpy as np
+from checkpoint import load_checkpoint
+
+# Trả về bởi _receive_migrants: đảo trước đã kết thúc và sẽ không gửi bộ gen nữa
+DONE = object()
+
+
+class IslandModel:
+    """Mô hình đảo: K quần thể GA độc lập, mỗi quần thể chạy trong một tiến trình riêng.
+
+    Mỗi đảo là một GeneticAlgorithm đầy đủ với phiên (session_id) riêng trong database
+    và seed riêng (tách từ seed chung bằng SeedSequence). Cứ migration_interval thế hệ,
+    đảo i gửi `migrants` bộ gen tốt nhất của mình cho đảo i + 1 (vòng tròn) qua một
+    hàng đợi và nhận lại từ đảo i - 1; bộ gen nhập cư thay cho một số con của thế hệ
+    mới. Ngoài những lúc di cư, các đảo không chờ nhau nên tốc độ tăng gần tuyến tính
+    theo số lõi CPU.
+
+    Tiến trình chính chỉ nhận báo cáo: mỗi đảo gửi ('generation', ...) sau mỗi thế hệ
+    và ('done', ...) khi kết thúc. Ctrl+C chỉ được tiến trình chính xử lý; các đảo làm
+    xong thế hệ đang chạy rồi lưu kết quả và dừng.
+
+    Mọi đảo chạy tới cùng một thế hệ đích (tuyệt đối), nên khi tiếp tục từ checkpoint mà
+    các đảo đã dừng ở những thế hệ khác nhau, đảo chậm hơn chạy bù và các lần di cư vẫn
+    rơi vào cùng số thế hệ. Đảo nào kết thúc (xong, dừng hay lỗi) cũng bật cờ `finished`
+    của mình để đảo sau không chờ bộ gen không bao giờ tới.
+    """
+    def __init__(self, num_islands, population_size, mutation_rate, input_nodes, hidden_nodes, output_nodes,
+                 migration_interval=10, migrants=5, seed=None, ga_options=None):
+        self.num_islands = num_islands
+        self.ga_args = (population_size, mutation_rate, input_nodes, hidden_nodes, output_nodes)
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.seeds = np.random.SeedSequence(seed).spawn(num_islands)
+        self.ga_options = ga_options or {}
+        self.best_fitness = 0
+        self.best_genome = None
+        self.session_ids = [None] * num_islands
+        self._stop_event = None
+
+    def run(self, generations, on_generation=None):
+        """Chạy `generations` thế hệ tính từ đảo đã đi xa nhất (0 nếu không tiếp tục từ checkpoint).
+
+        on_generation(generation, island_fitness) được gọi khi mọi đảo đã xong một thế hệ,
+        island_fitness là danh sách (max fitness, avg fitness) theo thứ tự đảo, None cho đảo
+        đã qua thế hệ đó trước khi tiếp tục. Trả về (best_fitness, best_genome) tốt nhất trên mọi đảo.
+        """
+        self._start_generations = self._resumed_generations()
+        target = max(self._start_generations) + generations
+        results = multiprocessing.Queue()
+        inboxes = [multiprocessing.Queue() for _ in range(self.num_islands)]
+        stop_event = self._stop_event = multiprocessing.Event()
+        finished = [multiprocessing.Event() for _ in range(self.num_islands)]
+        processes = [
+            multiprocessing.Process(
+                target=_island_main,
+                args=(i, inboxes, finished, results, stop_event, self.seeds[i], self.ga_args, self.ga_options,
+                      target, self.migration_interval, self.migrants),
+                name=f"island-{i}")
+            for i in range(self.num_islands)
+        ]
+        for process in processes:
+            process.start()
+
+        self._pending = {} # thế hệ -> {đảo: (max, avg)} cho đến khi đủ mọi đảo
+        self._done = 0
+        self._error = None
+        try:
+            try:
+                self._collect(results, processes, stop_event, on_generation)
+            except KeyboardInterrupt:
+                print("\nStopping islands after the current generation...")
+                stop_event.set()
+                # Vẫn phải đọc hết báo cáo, nếu không các đảo bị kẹt khi thoát
+                self._collect(results, processes, stop_event, on_generation)
+                raise
+        finally:
+            for process in processes:
+                process.join(timeout=30)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+        if self._error:
+            raise RuntimeError(self._error)
+        return self.best_fitness, self.best_genome
+
+    def _resumed_generations(self):
+        # Thế hệ mà mỗi đảo sẽ tiếp tục từ đó (chỉ đọc header của checkpoint)
+        resume_from = self.ga_options.get('resume_from')
+        if not resume_from:
+            return [0] * self.num_islands
+        return [load_checkpoint(f"{resume_from}.island{i}")[1]['generation'] for i in range(self.num_islands)]
+
+    def stop(self):
+        """Yêu cầu mọi đảo dừng sau thế hệ đang chạy (gọi được từ on_generation)."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def _collect(self, results, processes, stop_event, on_generation):
+        # Đọc báo cáo của các đảo cho tới khi mọi đảo báo xong
+        while self._done < self.num_islands:
+            try:
+                message = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    return # Mọi đảo đã dừng (có thể bị kill) mà không báo xong
+                continue
+            kind, island = message[0], message[1]
+            if kind == 'generation':
+                _, _, generation, max_fitness, avg_fitness, best_fitness, best_genome = message
+                self._update_best(best_fitness, best_genome)
+                self._pending.setdefault(generation, {})[island] = (max_fitness, avg_fitness)
+                # Đảo tiếp tục từ thế hệ này trở về sau không chạy lại nó
+                expected = sum(start < generation for start in self._start_generations)
+                if len(self._pending[generation]) == expected:
+                    row = self._pending.pop(generation)
+                    if on_generation:
+                        on_generation(generation, [row.get(i) for i in range(self.num_islands)])
+            elif kind == 'started':
+                self.session_ids[island] = message[2]
+            elif kind == 'done':
+                self._done += 1
+            elif kind == 'error':
+                self._error = f"Island {island} failed:\n{message[2]}"
+                stop_event.set()
+
+    def _update_best(self, fitness, genome):
+        if genome is not None and fitness > self.best_fitness:
+            self.best_fitness = fitness
+            self.best_genome = genome
+
+
+def _receive_migrants(inbox, upstream_finished, stop_event):
+    # Chờ bộ gen từ đảo trước; trả về DONE nếu đảo trước đã kết thúc, None nếu cả mô hình đang dừng
+    while not stop_event.is_set():
+        # Đọc cờ trước khi chờ: bộ gen gửi trước khi đảo trước kết thúc vẫn được nhận
+        upstream_done = upstream_finished.is_set()
+        try:
+            return inbox.get(timeout=0.5)
+        except queue.Empty:
+            if upstream_done:
+                return DONE
+    return None
+
+
+def _island_main(index, inboxes, finished, results, stop_event, seed, ga_args, ga_options, target,
+                 migration_interval, migrants):
+    # Chạy trong tiến trình của đảo `index`
+    from genetic_algorithm import GeneticAlgorithm
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # Tiến trình chính quyết định khi nào dừng
+    sys.stdout = open(os.devnull, 'w') # Tiến trình chính in tóm tắt cho mọi đảo
+
+    num_islands = len(inboxes)
+    ga = None
+    try:
+        options = dict(ga_options)
+        for key in ('checkpoint_path', 'resume_from'):
+            if options.get(key):
+                options[key] = f"{options[key]}.island{index}"
+        ga = GeneticAlgorithm(*ga_args, seed=seed, **options)
+        results.put(('started', index, ga.session_id))
+        reported_best = None
+        upstream_done = num_islands == 1
+        while ga.generation < target:
+            if stop_event.is_set():
+                break
+            # Checkpoint được ghi sau khi di cư để bộ gen nhập cư không bị mất khi tiếp tục
+            ga.run_generation(checkpoint=False)
+            if num_islands > 1 and ga.generation % migration_interval == 0:
+                # Di cư vòng tròn: gửi cho đảo sau, nhận từ đảo trước
+                inboxes[(index + 1) % num_islands].put(ga.top_genomes(migrants))
+                if not upstream_done:
+                    immigrants = _receive_migrants(inboxes[index], finished[index - 1], stop_event)
+                    if immigrants is None:
+                        break
+                    if immigrants is DONE:
+                        # Đảo trước đã xong: chạy tiếp tới đích mà không nhận bộ gen nữa
+                        upstream_done = True
+                    else:
+                        ga.receive_migrants(immigrants)
+            if ga.checkpoint_due():
+                ga.save_checkpoint()
+            # Chỉ gửi bộ gen tốt nhất khi nó vừa được cải thiện
+            best_genome = None
+            if ga.best_snake_brain is not None and ga.best_fitness != reported_best:
+                best_genome = ga.best_snake_brain.genome
+                reported_best = ga.best_fitness
+            results.put(('generation', index, ga.generation, float(ga.fitness_scores.max()),
+                         float(ga.avg_fitness), float(ga.best_fitness), best_genome))
+        if ga.checkpoint_path and ga.last_checkpoint_generation != ga.generation:
+            ga.save_checkpoint()
+    except Exception:
+        results.put(('error', index, traceback.format_exc()))
+    finally:
+        if ga is not None:
+            if ga.use_database:
+                ga.save_best_brain_to_db()
+                ga.close_db()
+            ga.close_workers()
+        finished[index].set()
+        # Bộ gen di cư chưa ai nhận thì bỏ, không chờ ghi hết khi thoát
+        for inbox in inboxes:
+            inbox.cancel_join_thread()
+        results.put(('done', index))
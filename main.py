@@ -1,12 +1,89 @@
-import pygame
 from genetic_algorithm import GeneticAlgorithm
 from game import run_simulation
 from snake import Snake
 from constants import *
 from database import Database
+from viewer import Viewer
+from islands import IslandModel
 import sys
 import argparse
 
+def stop_training(ga, args, checkpoint=True):
+    """Save everything that should survive the end of training and release resources."""
+    if checkpoint and ga.checkpoint_path and ga.last_checkpoint_generation != ga.generation:
+        ga.save_checkpoint()
+    # Explicitly save the best brain to database
+    if not args.no_db:
+        ga.save_best_brain_to_db()
+        ga.close_db()
+    ga.close_workers()
+    ga.close_viewer()
+
+def show_best_brain(best_brain):
+    print("\nRunning simulation with the best trained snake...")
+    best_trained_snake = Snake(brain=best_brain.clone(), color=(0, 150, 255)) # Màu khác cho dễ nhận biết
+    # Chạy mô phỏng cuối cùng với hiển thị
+    run_simulation(best_trained_snake, display=True)
+    import render
+    render.close_window()
+
+def train_islands(args):
+    """Train args.islands populations in parallel processes that exchange their best genomes."""
+    from neural_network import NeuralNetwork
+    model = IslandModel(
+        args.islands, POPULATION_SIZE, MUTATION_RATE, INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES,
+        migration_interval=args.migration_interval,
+        migrants=args.migrants,
+        seed=args.seed,
+        ga_options=dict(
+            use_database=not args.no_db,
+            load_from_session=args.load_session,
+            batched=args.batched,
+            workers=args.workers,
+            remote_workers=args.remote_workers.split(',') if args.remote_workers else None,
+            remote_timeout=args.remote_timeout,
+            arena_size=args.arena,
+            arena_kill_bonus=args.arena_kill_bonus,
+            db_flush_interval=args.db_flush_interval,
+            checkpoint_path=args.checkpoint or args.resume,
+            checkpoint_interval=args.checkpoint_interval,
+            resume_from=args.resume,
+            fitness_cache_size=args.fitness_cache,
+            record_episodes=args.record_episodes,
+        ))
+    # Các đảo không mở cửa sổ; tiến trình chính hiển thị con tốt nhất trên mọi đảo
+    viewer = None if args.headless else Viewer(INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES)
+
+    def report(generation, island_fitness):
+        # None: đảo đã chạy thế hệ này trước khi tiếp tục từ checkpoint
+        islands_str = " ".join("-" if fitness is None else f"{fitness[0]:.2f}" for fitness in island_fitness)
+        print(f"Generation {generation}: Island max fitness [{islands_str}], Overall best {model.best_fitness:.2f}")
+        if viewer:
+            if viewer.closed():
+                model.stop()
+            elif model.best_genome is not None and (generation % args.display_interval == 0 or generation == args.generations):
+                viewer.show(model.best_genome, generation, model.best_fitness)
+
+    print(f"Training {args.islands} islands of {POPULATION_SIZE} snakes, "
+          f"migrating {args.migrants} genomes every {args.migration_interval} generations")
+    try:
+        best_fitness, best_genome = model.run(args.generations, report)
+    except KeyboardInterrupt:
+        print("\nTraining interrupted.")
+        sys.exit()
+    finally:
+        if viewer:
+            viewer.close()
+
+    print("\nTraining Complete!")
+    if not args.no_db:
+        print("Island sessions: " + ", ".join(str(session_id) for session_id in model.session_ids))
+
+    if best_genome is None:
+        print("No best brain found after training.")
+    elif not args.headless and not (viewer and viewer.closed()):
+        show_best_brain(NeuralNetwork.from_genome(best_genome, INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES))
+
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Snake Game with Genetic Algorithm')
@@ -15,8 +92,34 @@ def main():
     parser.add_argument('--generations', type=int, default=100, help='Number of generations to train')
     parser.add_argument('--display-interval', type=int, default=10, help='Display best snake every N generations')
     parser.add_argument('--list-sessions', action='store_true', help='List all training sessions from database')
+    parser.add_argument('--migrate-db', action='store_true', help='Convert networks saved as JSON text to binary blobs in place')
+    parser.add_argument('--db-flush-interval', type=int, default=1, help='Commit database writes every N generations')
+    parser.add_argument('--batched', action='store_true', help='Evaluate the whole population in lockstep with NumPy')
+    parser.add_argument('--workers', type=int, default=1, help='Number of processes used to evaluate the population')
+    parser.add_argument('--remote-workers', help='Evaluate on eval_worker.py servers, comma-separated host:port list')
+    parser.add_argument('--remote-timeout', type=float, default=60.0, help='Seconds to wait for a remote worker before re-dispatching its batches (default: 60)')
+    parser.add_argument('--arena', type=int, default=0, help='Evaluate N snakes at a time on one shared board so they compete for food and space (0 = off)')
+    parser.add_argument('--arena-kill-bonus', type=float, default=0, help='Arena mode: fitness added each time another snake crashes into this one')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible training runs')
+    parser.add_argument('--checkpoint', help='Write a full-population checkpoint to this file')
+    parser.add_argument('--checkpoint-interval', type=int, default=10, help='Write the checkpoint every N generations')
+    parser.add_argument('--resume', help='Resume training from a checkpoint file')
+    parser.add_argument('--fitness-cache', type=int, default=0, help='Cache up to N evaluation results so unchanged genomes are not re-simulated (0 = off)')
+    parser.add_argument('--record-episodes', action='store_true', help='Record the best game of every generation in the database for replay.py')
+    parser.add_argument('--islands', type=int, default=1, help='Run N independent populations in parallel processes (island model)')
+    parser.add_argument('--migration-interval', type=int, default=10, help='Island model: exchange top genomes every N generations')
+    parser.add_argument('--migrants', type=int, default=5, help='Island model: number of top genomes each island sends to the next')
+    parser.add_argument('--headless', action='store_true', help='Never open a window (pygame is not imported)')
     args = parser.parse_args()
     
+    # Migrate legacy JSON networks if requested
+    if args.migrate_db:
+        db = Database()
+        converted = db.migrate_legacy_networks()
+        print(f"Converted {converted} neural network(s) to binary storage.")
+        db.close()
+        return
+
     # List all sessions if requested
     if args.list_sessions:
         db = Database()
@@ -32,11 +135,24 @@ def main():
                 # Format the date for better readability
                 date_str = str(date).split(".")[0] if "." in str(date) else str(date)
                 print(f"{session_id:<5} {date_str:<20} {gens if gens else 'N/A':<6} {pop_size:<10} {best_fitness if best_fitness else 'N/A':<15.2f} {avg_fitness if avg_fitness else 'N/A':<15.2f}")
+
+            # Thời gian trung bình mỗi thế hệ theo giai đoạn (chỉ các phiên đã ghi thời gian)
+            timings = db.get_session_timings()
+            if timings:
+                print("\n=== Generation Timings (average seconds per generation) ===")
+                print(f"{'ID':<5} {'Eval':>8} {'Select':>8} {'Cross':>8} {'DB':>8} {'Display':>8} {'Steps/s':>10} {'Slowest gen':>16}")
+                print("-" * 79)
+                for session_id, t in sorted(timings.items(), reverse=True):
+                    slowest = f"{t['slowest_generation']} ({t['slowest_seconds']:.2f}s)"
+                    print(f"{session_id:<5} {t['evaluation_seconds']:>8.3f} {t['selection_seconds']:>8.4f} {t['crossover_seconds']:>8.4f} "
+                          f"{t['database_seconds']:>8.4f} {t['display_seconds']:>8.3f} {t['steps_per_second']:>10.0f} {slowest:>16}")
             print("\nUse --load-session <ID> to continue training from a specific session.")
         db.close()
         return
 
-    pygame.init() # Khởi tạo pygame một lần ở đây
+    if args.islands > 1:
+        train_islands(args)
+        sys.exit()
 
     ga = GeneticAlgorithm(
         population_size=POPULATION_SIZE,
@@ -45,47 +161,56 @@ def main():
         hidden_nodes=HIDDEN_NODES,
         output_nodes=OUTPUT_NODES,
         use_database=not args.no_db,
-        load_from_session=args.load_session
+        load_from_session=args.load_session,
+        batched=args.batched,
+        workers=args.workers,
+        remote_workers=args.remote_workers.split(',') if args.remote_workers else None,
+        remote_timeout=args.remote_timeout,
+        arena_size=args.arena,
+        arena_kill_bonus=args.arena_kill_bonus,
+        seed=args.seed,
+        db_flush_interval=args.db_flush_interval,
+        checkpoint_path=args.checkpoint or args.resume,
+        checkpoint_interval=args.checkpoint_interval,
+        resume_from=args.resume,
+        fitness_cache_size=args.fitness_cache,
+        record_episodes=args.record_episodes,
+        # Con rắn tốt nhất được hiển thị trong một tiến trình riêng để huấn luyện không phải chờ
+        viewer=None if args.headless else Viewer(INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES)
     )
 
     num_generations = args.generations # Số thế hệ huấn luyện
     display_interval = args.display_interval
 
-    for gen in range(num_generations):
-        # Chạy 1 thế hệ, hiển thị con tốt nhất sau mỗi display_interval thế hệ
-        display_this_gen = (gen % display_interval == 0 or gen == num_generations - 1)
-        ga.run_generation(display_best=display_this_gen)
+    try:
+        for gen in range(num_generations):
+            # Chạy 1 thế hệ, hiển thị con tốt nhất sau mỗi display_interval thế hệ
+            display_this_gen = not args.headless and (gen % display_interval == 0 or gen == num_generations - 1)
+            ga.run_generation(display_best=display_this_gen)
 
-        # Xử lý sự kiện QUIT nếu cửa sổ hiển thị đang mở
-        for event in pygame.event.get():
-             if event.type == pygame.QUIT:
+            # Người dùng đóng cửa sổ hiển thị thì dừng huấn luyện
+            if ga.viewer and ga.viewer.closed():
                  # Save before quitting
-                 if not args.no_db:
-                     ga.save_best_brain_to_db()
-                     ga.close_db()
-                 pygame.quit()
+                 stop_training(ga, args)
                  sys.exit()
-
+    except KeyboardInterrupt:
+        # Ctrl+C có thể rơi vào giữa một thế hệ: không ghi đè checkpoint bằng trạng thái dở dang,
+        # --resume sẽ tiếp tục từ checkpoint gần nhất
+        print("\nTraining interrupted.")
+        stop_training(ga, args, checkpoint=False)
+        sys.exit()
 
     print("\nTraining Complete!")
-    
-    # Explicitly save the best brain to database
-    if not args.no_db:
-        ga.save_best_brain_to_db()
-        ga.close_db()
+    stop_training(ga, args)
 
     # Lấy bộ não tốt nhất sau khi huấn luyện
     best_brain = ga.get_best_brain()
 
-    if best_brain:
-        print("\nRunning simulation with the best trained snake...")
-        best_trained_snake = Snake(brain=best_brain.clone(), color=(0, 150, 255)) # Màu khác cho dễ nhận biết
-        # Chạy mô phỏng cuối cùng với hiển thị
-        run_simulation(best_trained_snake, display=True)
-    else:
+    if not best_brain:
         print("No best brain found after training.")
+    elif not args.headless:
+        show_best_brain(best_brain)
 
-    pygame.quit()
     sys.exit()
 
 if __name__ == '__main__':
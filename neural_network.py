@@ -1,14 +1,73 @@
 import numpy as np
 
+# Kiểu dữ liệu mặc định của bộ gen (có thể truyền dtype=np.float64 khi cần độ chính xác cao hơn)
+DEFAULT_DTYPE = np.float32
+
+# decide_batch / PopulationNetwork.decide: chênh lệch tối thiểu giữa hai output lớn nhất để
+# tin kết quả tính theo lô; gần hơn thì tính lại bằng feedforward (phép nhân ma trận theo lô
+# làm tròn khác một chút, tuỳ thứ tự cộng của BLAS)
+TIE_MARGIN = 1e-4
+
 def sigmoid(x):
     return 1 / (1 + np.exp(-x))
 
+def genome_layout(input_nodes, hidden_nodes, output_nodes):
+    """Vị trí (tên, shape, offset) của từng tham số trong bộ gen phẳng."""
+    layout = []
+    offset = 0
+    for name, shape in (('weights_ih', (hidden_nodes, input_nodes)),
+                        ('weights_ho', (output_nodes, hidden_nodes)),
+                        ('bias_h', (hidden_nodes, 1)),
+                        ('bias_o', (output_nodes, 1))):
+        layout.append((name, shape, offset))
+        offset += shape[0] * shape[1]
+    return layout
+
+def genome_length(input_nodes, hidden_nodes, output_nodes):
+    name, shape, offset = genome_layout(input_nodes, hidden_nodes, output_nodes)[-1]
+    return offset + shape[0] * shape[1]
+
+def crossover_segments(input_nodes, hidden_nodes, output_nodes):
+    # Với mỗi phần tử của bộ gen: thuộc đoạn (tham số) nào và vị trí trong đoạn đó
+    layout = genome_layout(input_nodes, hidden_nodes, output_nodes)
+    sizes = np.array([shape[0] * shape[1] for _, shape, _ in layout])
+    segment = np.repeat(np.arange(len(sizes)), sizes)
+    position = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return sizes, segment, position
+
+def random_genomes(rng, count, input_nodes, hidden_nodes, output_nodes, dtype=DEFAULT_DTYPE):
+    """Ma trận (count, genome_length) các bộ gen ngẫu nhiên, cùng phân phối với NeuralNetwork()."""
+    scale = np.empty(genome_length(input_nodes, hidden_nodes, output_nodes))
+    for name, shape, offset in genome_layout(input_nodes, hidden_nodes, output_nodes):
+        # He initialization cho trọng số, N(0, 1) cho bias
+        std = {'weights_ih': np.sqrt(2. / input_nodes), 'weights_ho': np.sqrt(2. / hidden_nodes)}.get(name, 1.)
+        scale[offset:offset + shape[0] * shape[1]] = std
+    return (rng.standard_normal((count, scale.size)) * scale).astype(dtype)
+
+
 class NeuralNetwork:
-    def __init__(self, input_nodes, hidden_nodes, output_nodes, weights_ih=None, weights_ho=None, bias_h=None, bias_o=None):
+    """Mạng nơ-ron một lớp ẩn.
+
+    Toàn bộ tham số nằm trong một bộ gen liên tục `genome` (float32 mặc định);
+    weights_ih, weights_ho, bias_h, bias_o chỉ là các view không sao chép vào đó,
+    nên clone là một lần copy, lai ghép/đột biến là vài phép toán vector và tuần
+    tự hoá là genome.tobytes().
+    """
+    def __init__(self, input_nodes, hidden_nodes, output_nodes, weights_ih=None, weights_ho=None, bias_h=None, bias_o=None, genome=None, dtype=None):
         self.input_nodes = input_nodes
         self.hidden_nodes = hidden_nodes
         self.output_nodes = output_nodes
 
+        if genome is not None:
+            # Dùng thẳng bộ gen được truyền vào (không sao chép nếu đúng kiểu)
+            self.genome = np.asarray(genome, dtype=dtype if dtype is not None else np.asarray(genome).dtype)
+            self._bind_views()
+            return
+
+        self.genome = np.empty(genome_length(input_nodes, hidden_nodes, output_nodes),
+                               dtype=dtype if dtype is not None else DEFAULT_DTYPE)
+        self._bind_views()
+
         if weights_ih is None:
             self.weights_ih = np.random.randn(self.hidden_nodes, self.input_nodes) * np.sqrt(2. / self.input_nodes) # He initialization
         else:
@@ -29,9 +88,28 @@ class NeuralNetwork:
         else:
             self.bias_o = bias_o
 
+    def _bind_views(self):
+        self._views = {}
+        for name, shape, offset in genome_layout(self.input_nodes, self.hidden_nodes, self.output_nodes):
+            self._views[name] = self.genome[offset:offset + shape[0] * shape[1]].reshape(shape)
+
+    # Các tham số là view vào genome; gán giá trị mới sẽ chép vào bộ gen
+    def _param(name):
+        def getter(self):
+            return self._views[name]
+        def setter(self, value):
+            self._views[name][...] = np.reshape(value, self._views[name].shape)
+        return property(getter, setter)
+
+    weights_ih = _param('weights_ih')
+    weights_ho = _param('weights_ho')
+    bias_h = _param('bias_h')
+    bias_o = _param('bias_o')
+    del _param
+
     def feedforward(self, input_array):
         # Đảm bảo input là cột vector
-        inputs = np.array(input_array, ndmin=2).T
+        inputs = np.array(input_array, dtype=self.genome.dtype, ndmin=2).T
 
         # Tính toán tín hiệu vào lớp ẩn
         hidden_inputs = np.dot(self.weights_ih, inputs) + self.bias_h
@@ -45,67 +123,113 @@ class NeuralNetwork:
 
         return final_outputs.flatten() # Trả về mảng 1 chiều
 
+    def feedforward_batch(self, inputs):
+        # Nhiều input cùng lúc: (B, input_nodes) -> (B, output_nodes), mỗi lớp một phép nhân ma trận
+        x = np.asarray(inputs, dtype=self.genome.dtype)
+        hidden = sigmoid(x @ self.weights_ih.T + self.bias_h[:, 0])
+        return sigmoid(hidden @ self.weights_ho.T + self.bias_o[:, 0])
+
+    def decide_batch(self, inputs):
+        """Hành động (argmax output) cho mỗi hàng của `inputs`, luôn giống hệt argmax(feedforward(hàng))."""
+        outputs = self.feedforward_batch(inputs)
+        actions = np.argmax(outputs, axis=1)
+        top2 = np.sort(outputs, axis=1)[:, -2:]
+        for i in np.flatnonzero(top2[:, 1] - top2[:, 0] < TIE_MARGIN):
+            actions[i] = np.argmax(self.feedforward(inputs[i]))
+        return actions
+
     def mutate(self, mutation_rate):
-        # Đột biến trọng số IH
-        mask = np.random.rand(*self.weights_ih.shape) < mutation_rate
-        noise = np.random.randn(*self.weights_ih.shape) * 0.1 # Nhiễu nhỏ
-        self.weights_ih += mask * noise
-
-        # Đột biến trọng số HO
-        mask = np.random.rand(*self.weights_ho.shape) < mutation_rate
-        noise = np.random.randn(*self.weights_ho.shape) * 0.1
-        self.weights_ho += mask * noise
-
-        # Đột biến bias H
-        mask = np.random.rand(*self.bias_h.shape) < mutation_rate
-        noise = np.random.randn(*self.bias_h.shape) * 0.1
-        self.bias_h += mask * noise
-
-        # Đột biến bias O
-        mask = np.random.rand(*self.bias_o.shape) < mutation_rate
-        noise = np.random.randn(*self.bias_o.shape) * 0.1
-        self.bias_o += mask * noise
+        # Đột biến toàn bộ bộ gen trong một lần: mỗi tham số bị cộng nhiễu nhỏ với xác suất mutation_rate
+        mask = np.random.rand(self.genome.size) < mutation_rate
+        noise = np.random.randn(self.genome.size) * 0.1 # Nhiễu nhỏ
+        self.genome += mask * noise
 
     def crossover(self, partner):
-        child_nn = NeuralNetwork(self.input_nodes, self.hidden_nodes, self.output_nodes)
-
-        # Lai ghép trọng số IH (ví dụ: single point crossover)
-        mid_point = np.random.randint(0, self.weights_ih.size)
-        flat_w_ih1 = self.weights_ih.flatten()
-        flat_w_ih2 = partner.weights_ih.flatten()
-        child_flat_w_ih = np.concatenate((flat_w_ih1[:mid_point], flat_w_ih2[mid_point:]))
-        child_nn.weights_ih = child_flat_w_ih.reshape(self.weights_ih.shape)
-
-        # Lai ghép trọng số HO
-        mid_point = np.random.randint(0, self.weights_ho.size)
-        flat_w_ho1 = self.weights_ho.flatten()
-        flat_w_ho2 = partner.weights_ho.flatten()
-        child_flat_w_ho = np.concatenate((flat_w_ho1[:mid_point], flat_w_ho2[mid_point:]))
-        child_nn.weights_ho = child_flat_w_ho.reshape(self.weights_ho.shape)
-
-        # Lai ghép bias H
-        mid_point = np.random.randint(0, self.bias_h.size)
-        flat_b_h1 = self.bias_h.flatten()
-        flat_b_h2 = partner.bias_h.flatten()
-        child_flat_b_h = np.concatenate((flat_b_h1[:mid_point], flat_b_h2[mid_point:]))
-        child_nn.bias_h = child_flat_b_h.reshape(self.bias_h.shape)
-
-        # Lai ghép bias O
-        mid_point = np.random.randint(0, self.bias_o.size)
-        flat_b_o1 = self.bias_o.flatten()
-        flat_b_o2 = partner.bias_o.flatten()
-        child_flat_b_o = np.concatenate((flat_b_o1[:mid_point], flat_b_o2[mid_point:]))
-        child_nn.bias_o = child_flat_b_o.reshape(self.bias_o.shape)
-
-        return child_nn
+        # Lai ghép một điểm (single point crossover) riêng cho từng tham số IH, HO, bias H, bias O,
+        # thực hiện cùng lúc trên cả bộ gen bằng một mặt nạ
+        sizes, segment, position = crossover_segments(self.input_nodes, self.hidden_nodes, self.output_nodes)
+        mid_points = np.random.randint(0, sizes)
+        child_genome = np.where(position < mid_points[segment], self.genome, partner.genome)
+        return NeuralNetwork(self.input_nodes, self.hidden_nodes, self.output_nodes,
+                             genome=child_genome.astype(self.genome.dtype, copy=False))
+
+    def to_genome(self):
+        # Bộ gen phẳng (không sao chép) để gửi sang tiến trình khác, lưu trữ...
+        return self.genome
+
+    @classmethod
+    def from_genome(cls, genome, input_nodes, hidden_nodes, output_nodes):
+        # Ngược lại với to_genome
+        return cls(input_nodes, hidden_nodes, output_nodes, genome=genome)
+
+    def to_bytes(self):
+        return self.genome.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, input_nodes, hidden_nodes, output_nodes, dtype=DEFAULT_DTYPE):
+        return cls(input_nodes, hidden_nodes, output_nodes, genome=np.frombuffer(data, dtype=dtype).copy())
 
     def clone(self):
         # Tạo bản sao sâu của mạng nơ-ron
-        cloned_nn = NeuralNetwork(
-            self.input_nodes, self.hidden_nodes, self.output_nodes,
-            weights_ih=self.weights_ih.copy(),
-            weights_ho=self.weights_ho.copy(),
-            bias_h=self.bias_h.copy(),
-            bias_o=self.bias_o.copy()
-        )
-        return cloned_nn
\ No newline at end of file
+        return NeuralNetwork(self.input_nodes, self.hidden_nodes, self.output_nodes, genome=self.genome.copy())
+
+
+class PopulationNetwork:
+    """Các mạng nơ-ron của cả quần thể, xếp chồng thành tensor 3 chiều.
+
+    Hàng i của `genomes` là bộ gen của mạng thứ i; weights_ih... là các view 3 chiều
+    vào ma trận đó. feedforward tính quyết định cho mọi cá thể (hoặc một tập con
+    `rows`) bằng một phép matmul theo lô thay vì N lần np.dot.
+    """
+    def __init__(self, genomes, input_nodes, hidden_nodes, output_nodes):
+        self.genomes = genomes # (N, genome_length)
+        self.input_nodes = input_nodes
+        self.hidden_nodes = hidden_nodes
+        self.output_nodes = output_nodes
+        n = genomes.shape[0]
+        views = {}
+        for name, shape, offset in genome_layout(input_nodes, hidden_nodes, output_nodes):
+            views[name] = genomes[:, offset:offset + shape[0] * shape[1]].reshape(n, *shape)
+        self.weights_ih = views['weights_ih']       # (N, hidden, input)
+        self.weights_ho = views['weights_ho']       # (N, output, hidden)
+        self.bias_h = views['bias_h'][:, :, 0]      # (N, hidden)
+        self.bias_o = views['bias_o'][:, :, 0]      # (N, output)
+
+    @classmethod
+    def from_networks(cls, networks):
+        nn = networks[0]
+        return cls(np.stack([network.genome for network in networks]),
+                   nn.input_nodes, nn.hidden_nodes, nn.output_nodes)
+
+    def __len__(self):
+        return self.genomes.shape[0]
+
+    def feedforward(self, inputs, rows=None):
+        # inputs: (B, input_nodes), một hàng cho mỗi cá thể trong `rows` (mặc định: tất cả)
+        if rows is None:
+            rows = slice(None)
+        inputs = np.asarray(inputs, dtype=self.genomes.dtype)
+        hidden = sigmoid(np.matmul(self.weights_ih[rows], inputs[:, :, None])[:, :, 0] + self.bias_h[rows])
+        outputs = sigmoid(np.matmul(self.weights_ho[rows], hidden[:, :, None])[:, :, 0] + self.bias_o[rows])
+        return outputs
+
+    def decide(self, inputs, rows=None):
+        # Hành động có output cao nhất cho mỗi cá thể (0=trái, 1=thẳng, 2=phải), luôn giống
+        # hệt argmax(NeuralNetwork.feedforward) của từng cá thể (xem decide_batch)
+        outputs = self.feedforward(inputs, rows)
+        actions = np.argmax(outputs, axis=1)
+        top2 = np.sort(outputs, axis=1)[:, -2:]
+        ties = np.flatnonzero(top2[:, 1] - top2[:, 0] < TIE_MARGIN)
+        if len(ties):
+            # Cá thể ứng với từng hàng input
+            individuals = np.arange(len(self)) if rows is None else np.arange(len(self))[rows]
+            for i in ties:
+                network = NeuralNetwork.from_genome(self.genomes[individuals[i]],
+                                                    self.input_nodes, self.hidden_nodes, self.output_nodes)
+                actions[i] = np.argmax(network.feedforward(inputs[i]))
+        return actions
+
+    def to_network(self, i):
+        # Xuất hàng i thành một NeuralNetwork bình thường (bản sao độc lập)
+        return NeuralNetwork(self.input_nodes, self.hidden_nodes, self.output_nodes,
+                             genome=self.genomes[i].copy())
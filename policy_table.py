@@ -0,0 +1,57 @@
+import numpy as np
+from constants import *
+
+# Bảng quyết định đã biên dịch từ một mạng nơ-ron.
+# Với bộ cảm biến 8 input của Snake.get_inputs, 6 input đầu là cờ 0/1 (nguy hiểm thẳng /
+# trái / phải, mồi trái / thẳng / phải) và 2 input cuối là khoảng cách tới tường
+# (số nguyên 0..D-1 chia cho D = max(GRID_WIDTH, GRID_HEIGHT)). Cả không gian input chỉ có
+# 64 * D * D trường hợp, nên có thể tính trước hành động cho mọi trường hợp:
+#   chỉ số = (cờ * D + khoảng cách thẳng) * D + khoảng cách trái,
+#   cờ = nguy hiểm thẳng << 5 | trái << 4 | phải << 3 | mồi trái << 2 | thẳng << 1 | phải
+NUM_FLAGS = 6
+
+
+class PolicyTable:
+    """Hành động (0=trái, 1=thẳng, 2=phải) cho mọi input rời rạc, mỗi hành động một byte."""
+    def __init__(self, actions, distances):
+        self.actions = bytes(actions)
+        self.distances = distances
+        if len(self.actions) != (1 << NUM_FLAGS) * distances * distances:
+            raise ValueError("Policy table size does not match its distance range")
+
+    def __len__(self):
+        return len(self.actions)
+
+    def decide(self, inputs):
+        # inputs: đúng danh sách trả về bởi Snake.get_inputs
+        d = self.distances
+        flags = inputs[0] << 5 | inputs[1] << 4 | inputs[2] << 3 | inputs[3] << 2 | inputs[4] << 1 | inputs[5]
+        return self.actions[(flags * d + int(inputs[6] * d + 0.5)) * d + int(inputs[7] * d + 0.5)]
+
+    def as_array(self):
+        # Bảng dạng (64, D, D) để phân tích
+        return np.frombuffer(self.actions, dtype=np.uint8).reshape(1 << NUM_FLAGS, self.distances, self.distances)
+
+
+def policy_inputs(distances):
+    """Mọi input rời rạc (64 * D * D, 8) theo đúng thứ tự chỉ số của bảng."""
+    flags = (np.arange(1 << NUM_FLAGS)[:, None] >> np.arange(NUM_FLAGS - 1, -1, -1)) & 1
+    walls = np.arange(distances) / distances # Cùng giá trị với SensorTables.wall_inputs
+    f, s, l = np.meshgrid(np.arange(1 << NUM_FLAGS), np.arange(distances), np.arange(distances), indexing='ij')
+    inputs = np.empty((f.size, INPUT_NODES))
+    inputs[:, :NUM_FLAGS] = flags[f.ravel()]
+    inputs[:, NUM_FLAGS] = walls[s.ravel()]
+    inputs[:, NUM_FLAGS + 1] = walls[l.ravel()]
+    return inputs
+
+
+def compile_policy(brain, width=GRID_WIDTH, height=GRID_HEIGHT):
+    """Tính hành động của `brain` cho mọi input trong một lần duyệt theo lô và trả về PolicyTable.
+
+    Bảng cho đúng quyết định của brain.feedforward (xem NeuralNetwork.decide_batch).
+    """
+    if brain.input_nodes != INPUT_NODES:
+        raise ValueError(f"Only brains with the {INPUT_NODES}-input sensor set can be compiled")
+    distances = max(width, height)
+    actions = brain.decide_batch(policy_inputs(distances)).astype(np.uint8)
+    return PolicyTable(actions.tobytes(), distances)
@@ -0,0 +1,60 @@
+import numpy as np
+from snake import Snake
+from game import run_simulation
+from constants import *
+
+# Một lượt chơi được lưu (bảng episodes) dưới dạng seed, số hành động và các hành động
+# đóng gói 2 bit mỗi hành động. Mỗi bước chỉ có 3 hành động (0=trái, 1=thẳng, 2=phải)
+# nên 4 bước vừa một byte; cùng seed thì hướng ban đầu và chuỗi vị trí mồi giống hệt,
+# nên (seed, hành động) là đủ để dựng lại cả lượt chơi mà không cần mạng nơ-ron.
+
+
+def pack_actions(actions):
+    """Đóng gói các hành động (0..2) thành bytes, 2 bit mỗi hành động."""
+    actions = np.asarray(actions, dtype=np.uint8)
+    padded = np.zeros(-(-len(actions) // 4) * 4, dtype=np.uint8)
+    padded[:len(actions)] = actions
+    packed = padded[0::4] | (padded[1::4] << 2) | (padded[2::4] << 4) | (padded[3::4] << 6)
+    return packed.tobytes()
+
+
+def unpack_actions(data, count):
+    """Ngược lại với pack_actions: trả về mảng uint8 gồm `count` hành động."""
+    packed = np.frombuffer(data, dtype=np.uint8)
+    actions = np.empty(len(packed) * 4, dtype=np.uint8)
+    for i in range(4):
+        actions[i::4] = (packed >> (2 * i)) & 3
+    return actions[:count]
+
+
+class Episode:
+    """Một lượt chơi đã ghi: seed và chuỗi hành động, kèm kết quả (score, steps, fitness)."""
+    def __init__(self, seed=None, actions=None, score=None, steps=None, fitness=None):
+        self.seed = seed
+        self.actions = list(actions) if actions is not None else []
+        self.score = score
+        self.steps = steps
+        self.fitness = fitness
+
+    def finish(self, seed, snake):
+        # Được run_simulation gọi khi lượt chơi kết thúc
+        self.seed = seed
+        self.score = snake.score
+        self.steps = snake.steps_taken
+        self.fitness = snake.fitness
+
+
+def record_episode(brain, seed=None):
+    """Chơi một lượt (không hiển thị) với `brain` và trả về Episode đã ghi."""
+    episode = Episode()
+    run_simulation(Snake(brain=brain), display=False, seed=seed, recording=episode)
+    return episode
+
+
+def replay_episode(episode, display=False, fps=FPS):
+    """Phát lại một lượt chơi đã ghi, không dùng mạng nơ-ron. Trả về (fitness, score, steps).
+
+    display=False phát lại không hiển thị (để phân tích); fps=0 hiển thị nhanh nhất có thể.
+    """
+    snake = Snake(random_brain=False, color=(0, 150, 255))
+    return run_simulation(snake, display=display, seed=episode.seed, actions=episode.actions, fps=fps)
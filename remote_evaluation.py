@@ -0,0 +1,286 @@
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import numpy as np
+from neural_network import PopulationNetwork, genome_length
+from evaluation import evaluate_genome
+
+# Giao thức giữa coordinator và worker: mỗi khung (frame) gồm độ dài payload (uint32,
+# little-endian) rồi payload. Payload bắt đầu bằng HEADER:
+#   MAGIC | loại khung | batch_id | số hàng | input, hidden, output
+# Khung REQUEST:  HEADER | seeds (uint64 x số hàng) | bộ gen (float32, số hàng x genome_length)
+# Khung RESULT:   HEADER | fitness (float64) | score (int64) | steps (int64), mỗi mảng một giá trị mỗi hàng
+# Khung ERROR:    HEADER | thông báo lỗi (UTF-8)
+# Chỉ có mảng số thô đi qua mạng (không pickle), nên worker không chạy mã do bên kia gửi.
+MAGIC = b'SNW1'
+HEADER = struct.Struct('<4sBIIIII')
+LENGTH = struct.Struct('<I')
+REQUEST, RESULT, ERROR = 1, 2, 3
+MAX_FRAME_SIZE = 1 << 30
+
+DEFAULT_PORT = 5757
+
+
+def send_frame(sock, payload):
+    sock.sendall(LENGTH.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Connection closed by peer")
+        received += count
+    return buffer
+
+
+def recv_frame(sock):
+    size, = LENGTH.unpack(_recv_exact(sock, LENGTH.size))
+    if size > MAX_FRAME_SIZE:
+        raise ConnectionError(f"Frame of {size} bytes is too large")
+    return _recv_exact(sock, size)
+
+
+def pack_request(batch_id, genomes, seeds, layer_sizes):
+    genomes = np.ascontiguousarray(genomes, dtype='<f4')
+    return (HEADER.pack(MAGIC, REQUEST, batch_id, len(genomes), *layer_sizes)
+            + np.asarray(seeds, dtype='<u8').tobytes() + genomes.tobytes())
+
+
+def pack_result(batch_id, results, layer_sizes):
+    fitness, score, steps = (np.array(column) for column in zip(*results)) if results else ([], [], [])
+    return (HEADER.pack(MAGIC, RESULT, batch_id, len(results), *layer_sizes)
+            + np.asarray(fitness, dtype='<f8').tobytes()
+            + np.asarray(score, dtype='<i8').tobytes()
+            + np.asarray(steps, dtype='<i8').tobytes())
+
+
+def pack_error(batch_id, message, layer_sizes=(0, 0, 0)):
+    return HEADER.pack(MAGIC, ERROR, batch_id, 0, *layer_sizes) + message.encode('utf-8')
+
+
+def unpack_frame(payload):
+    """Giải mã một khung: trả về (loại, batch_id, layer_sizes, nội dung).
+
+    Nội dung là (bộ gen, seeds) cho REQUEST, danh sách (fitness, score, steps) cho
+    RESULT và chuỗi thông báo cho ERROR.
+    """
+    magic, kind, batch_id, rows, *layer_sizes = HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise ValueError("Not an evaluation worker frame")
+    layer_sizes = tuple(layer_sizes)
+    body = memoryview(payload)[HEADER.size:]
+    if kind == REQUEST:
+        length = genome_length(*layer_sizes)
+        if len(body) != rows * (8 + 4 * length):
+            raise ValueError("Request size does not match its header")
+        seeds = np.frombuffer(body, dtype='<u8', count=rows)
+        genomes = np.frombuffer(body, dtype='<f4', offset=8 * rows).reshape(rows, length)
+        return kind, batch_id, layer_sizes, (genomes, [int(seed) for seed in seeds])
+    if kind == RESULT:
+        if len(body) != rows * 24:
+            raise ValueError("Result size does not match its header")
+        fitness = np.frombuffer(body, dtype='<f8', count=rows)
+        score = np.frombuffer(body, dtype='<i8', count=rows, offset=8 * rows)
+        steps = np.frombuffer(body, dtype='<i8', count=rows, offset=16 * rows)
+        return kind, batch_id, layer_sizes, [(float(f), int(s), int(t)) for f, s, t in zip(fitness, score, steps)]
+    if kind == ERROR:
+        return kind, batch_id, layer_sizes, bytes(body).decode('utf-8', 'replace')
+    raise ValueError(f"Unknown frame type {kind}")
+
+
+# --- Phía worker ---
+
+def evaluate_batch(genomes, seeds, layer_sizes, batched=True):
+    """Chạy một lượt chơi cho mỗi bộ gen; kết quả giống hệt khi chạy ngay trên coordinator."""
+    if not batched:
+        return [evaluate_genome(genome, layer_sizes, seed) for genome, seed in zip(genomes, seeds)]
+    from batch_game import run_batch_simulation
+    from snake import Snake
+    brains = PopulationNetwork(genomes, *layer_sizes)
+    snakes = [Snake(random_brain=False) for _ in range(len(genomes))]
+    return run_batch_simulation(snakes, seeds, brains=brains)
+
+
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    # Một kết nối từ coordinator: xử lý lần lượt các khung yêu cầu cho tới khi bên kia đóng
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                payload = recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            batch_id, layer_sizes = 0, (0, 0, 0)
+            try:
+                kind, batch_id, layer_sizes, (genomes, seeds) = unpack_frame(payload)
+                if kind != REQUEST:
+                    raise ValueError(f"Expected a request frame, got type {kind}")
+                results = evaluate_batch(genomes, seeds, layer_sizes, self.server.batched)
+                reply = pack_result(batch_id, results, layer_sizes)
+            except Exception as e:
+                reply = pack_error(batch_id, f"{type(e).__name__}: {e}", layer_sizes)
+            try:
+                send_frame(self.request, reply)
+            except OSError:
+                return
+
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    """Worker đánh giá fitness: nhận lô bộ gen + seed qua TCP và trả về (fitness, score, steps).
+
+    Mỗi kết nối được phục vụ bởi một luồng riêng và xử lý các khung theo thứ tự nhận,
+    nên coordinator có thể gửi trước nhiều lô (pipelining) mà không phải chờ kết quả.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, batched=True):
+        self.batched = batched
+        super().__init__(address, _WorkerHandler)
+
+
+# --- Phía coordinator ---
+
+def parse_address(address):
+    """'host:port' hoặc 'host' -> (host, port)."""
+    host, _, port = address.rpartition(':')
+    if not host:
+        return address, DEFAULT_PORT
+    return host, int(port)
+
+
+class RemoteEvaluator:
+    """Đánh giá fitness trên các worker từ xa (xem WorkerServer), cùng giao diện với ParallelEvaluator.
+
+    Quần thể được chia thành các lô batch_size bộ gen. Mỗi worker có một kết nối và một
+    luồng gửi tối đa `pipeline` lô trước khi chờ kết quả, để worker không phải ngồi chờ
+    trong lúc lô tiếp theo đang truyền. Worker không trả lời trong `timeout` giây, mất
+    kết nối hoặc không kết nối được thì bị bỏ qua cho tới hết thế hệ và các lô nó đang
+    giữ được gửi lại cho các worker còn lại; thế hệ sau sẽ thử kết nối lại. Vì seed đi
+    kèm bộ gen nên kết quả không phụ thuộc worker nào đã chạy lô nào.
+    """
+    def __init__(self, addresses, batch_size=50, pipeline=2, timeout=60.0, connect_timeout=5.0):
+        self.addresses = [parse_address(address) if isinstance(address, str) else tuple(address)
+                          for address in addresses]
+        if not self.addresses:
+            raise ValueError("RemoteEvaluator needs at least one worker address")
+        self.workers = len(self.addresses)
+        self.batch_size = batch_size
+        self.pipeline = pipeline
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.sockets = [None] * self.workers
+        self.redispatched = 0 # Số lô đã phải gửi lại (tổng cộng)
+
+    def _connect(self, index):
+        if self.sockets[index] is None:
+            sock = socket.create_connection(self.addresses[index], timeout=self.connect_timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.settimeout(self.timeout)
+            self.sockets[index] = sock
+        return self.sockets[index]
+
+    def _drop(self, index):
+        sock, self.sockets[index] = self.sockets[index], None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def evaluate(self, genomes, seeds, layer_sizes):
+        batches = [(i, min(i + self.batch_size, len(genomes))) for i in range(0, len(genomes), self.batch_size)]
+        pending = queue.Queue()
+        for batch_id in range(len(batches)):
+            pending.put(batch_id)
+        state = {'results': [None] * len(genomes), 'remaining': len(batches), 'error': None}
+        lock = threading.Lock()
+        finished = threading.Event()
+        if not batches:
+            return []
+
+        threads = [threading.Thread(target=self._run_worker,
+                                    args=(index, genomes, seeds, layer_sizes, batches, pending, state, lock, finished),
+                                    name=f"remote-worker-{index}", daemon=True)
+                   for index in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        # Chờ mọi lô xong; nếu mọi luồng đã dừng mà vẫn còn lô thì không còn worker nào dùng được
+        while not finished.wait(0.1):
+            if not any(thread.is_alive() for thread in threads):
+                finished.set()
+        for thread in threads:
+            thread.join()
+
+        if state['error']:
+            raise RuntimeError(state['error'])
+        if state['remaining']:
+            raise RuntimeError(f"No evaluation worker could finish the generation "
+                               f"({state['remaining']} of {len(batches)} batches left)")
+        return state['results']
+
+    def _run_worker(self, index, genomes, seeds, layer_sizes, batches, pending, state, lock, finished):
+        # Luồng của một worker: giữ tối đa `pipeline` lô đang chạy, gửi lại chúng nếu worker hỏng
+        in_flight = []
+        try:
+            sock = self._connect(index)
+            while not finished.is_set():
+                while len(in_flight) < self.pipeline:
+                    try:
+                        # Khi rảnh thì chờ một chút: có thể có lô bị trả lại từ worker hỏng
+                        batch_id = pending.get_nowait() if in_flight else pending.get(timeout=0.05)
+                    except queue.Empty:
+                        break
+                    start, end = batches[batch_id]
+                    in_flight.append(batch_id)
+                    send_frame(sock, pack_request(batch_id, genomes[start:end], seeds[start:end], layer_sizes))
+                if not in_flight:
+                    continue
+
+                kind, batch_id, _, content = unpack_frame(recv_frame(sock))
+                if kind == ERROR:
+                    with lock:
+                        state['error'] = f"Worker {self._name(index)} failed: {content}"
+                    finished.set()
+                    return
+                if batch_id not in in_flight:
+                    raise ConnectionError(f"Unexpected batch {batch_id}")
+                in_flight.remove(batch_id)
+                start, end = batches[batch_id]
+                if len(content) != end - start:
+                    raise ConnectionError(f"Batch {batch_id} returned {len(content)} results for {end - start} genomes")
+                with lock:
+                    if state['results'][start] is None:
+                        state['results'][start:end] = content
+                        state['remaining'] -= 1
+                        if state['remaining'] == 0:
+                            finished.set()
+        except (OSError, ConnectionError, ValueError) as e:
+            # Hết thời gian chờ, mất kết nối hoặc khung hỏng: bỏ worker này, trả lại các lô của nó
+            self._drop(index)
+            if in_flight:
+                print(f"\nWorker {self._name(index)} lost ({e}); re-dispatching {len(in_flight)} batch(es)", end="")
+                with lock:
+                    self.redispatched += len(in_flight)
+                for batch_id in in_flight:
+                    pending.put(batch_id)
+            else:
+                print(f"\nWorker {self._name(index)} unavailable ({e})", end="")
+            return
+        # Thế hệ đã xong (hoặc bị huỷ) khi lô này còn đang chạy: kết nối không còn đồng bộ
+        if in_flight:
+            self._drop(index)
+
+    def _name(self, index):
+        host, port = self.addresses[index]
+        return f"{host}:{port}"
+
+    def close(self):
+        for index in range(self.workers):
+            self._drop(index)
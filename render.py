@@ -0,0 +1,133 @@
+import pygame
+from collections import deque
+from constants import *
+
+# Phần hiển thị tách riêng khỏi lõi mô phỏng: chỉ được import khi cần vẽ
+# (display=True hoặc chạy demo), nên huấn luyện không cần pygame/SDL.
+
+HEAD_COLORS = ((0, 100, 0), (0, 150, 0)) # Viền và lõi của đầu rắn
+FOOD_COLORS = (RED, (255, 100, 100))
+
+def open_window(caption='Snake AI Simulation'):
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(caption)
+    return screen
+
+def quit_requested():
+    # Kiểm tra sự kiện đóng cửa sổ (chỉ có ý nghĩa khi cửa sổ đang mở)
+    if not pygame.display.get_init():
+        return False
+    return any(event.type == pygame.QUIT for event in pygame.event.get())
+
+def close_window():
+    _sprites.clear() # Các ô vẽ sẵn gắn với cửa sổ vừa đóng
+    pygame.quit()
+
+def _cell_sprite(outer, inner, margin):
+    # Một ô vẽ sẵn: nền màu `outer`, lõi màu `inner` cách mép `margin` pixel
+    sprite = pygame.Surface((GRID_SIZE, GRID_SIZE))
+    sprite.fill(outer)
+    sprite.fill(inner, (margin, margin, GRID_SIZE - 2 * margin, GRID_SIZE - 2 * margin))
+    return sprite.convert() if pygame.display.get_surface() else sprite
+
+_sprites = {}
+
+def get_sprite(kind, color=None):
+    """Ô vẽ sẵn (dùng lại giữa các khung hình): 'head', 'food', 'background' hoặc 'body' theo màu."""
+    key = (kind, color)
+    if key not in _sprites:
+        if kind == 'head':
+            _sprites[key] = _cell_sprite(*HEAD_COLORS, 1)
+        elif kind == 'food':
+            _sprites[key] = _cell_sprite(*FOOD_COLORS, 2)
+        elif kind == 'background':
+            _sprites[key] = _cell_sprite(BLACK, BLACK, 0)
+        else:
+            _sprites[key] = _cell_sprite(color, tuple(int(c * 0.8) for c in color), 1) # Màu trong nhạt hơn
+    return _sprites[key]
+
+def draw_snake(surface, snake):
+    if not snake.alive: return # Không vẽ rắn đã chết
+
+    body = get_sprite('body', snake.color)
+    for i, p in enumerate(snake.positions):
+        surface.blit(get_sprite('head') if i == 0 else body, (p[0] * GRID_SIZE, p[1] * GRID_SIZE))
+
+def draw_food(surface, food):
+    surface.blit(get_sprite('food'), (food.position[0] * GRID_SIZE, food.position[1] * GRID_SIZE))
+
+
+class BoardRenderer:
+    """Vẽ một lượt chơi theo kiểu tăng dần.
+
+    Mỗi khung hình chỉ vẽ lại các ô thay đổi (đầu mới, ô đầu cũ, đuôi vừa bỏ, mồi) bằng
+    các ô vẽ sẵn và cập nhật đúng những vùng đó bằng display.update(rects), thay vì xoá
+    cả màn hình rồi vẽ lại toàn bộ thân rắn. Các Rect của từng ô được tạo sẵn một lần.
+    Nếu giữa hai khung hình rắn đi nhiều bước (tua nhanh), các ô thay đổi vẫn được tìm
+    đúng; nếu không khớp được với khung hình trước (ván mới) thì vẽ lại toàn bộ.
+    """
+    def __init__(self, surface):
+        self.surface = surface
+        self.rects = [pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+                      for y in range(GRID_HEIGHT) for x in range(GRID_WIDTH)]
+        self.drawn_body = deque() # Thân rắn như đang hiển thị, từ đầu tới đuôi
+        self.drawn_food = None
+        self.dirty = []
+
+    def _rect(self, pos):
+        return self.rects[pos[1] * GRID_WIDTH + pos[0]]
+
+    def _draw_cell(self, pos, sprite):
+        rect = self._rect(pos)
+        self.surface.blit(sprite, rect)
+        self.dirty.append(rect)
+
+    def reset(self, snake, food):
+        """Vẽ lại toàn bộ bàn cờ (đầu ván hoặc khi không vẽ tăng dần được)."""
+        self.surface.fill(BLACK)
+        draw_snake(self.surface, snake)
+        draw_food(self.surface, food)
+        pygame.display.flip()
+        self.drawn_body = deque(snake.positions)
+        self.drawn_food = food.position
+        self.dirty.clear()
+
+    def update(self, snake, food):
+        """Vẽ các ô đã thay đổi kể từ khung hình trước và đưa chúng lên màn hình."""
+        positions = snake.positions
+        if not self.drawn_body or not snake.alive:
+            self.reset(snake, food)
+            return
+        # Số bước đã đi: vị trí của đầu cũ trong thân hiện tại
+        old_head = self.drawn_body[0]
+        steps = 0
+        while steps < len(positions) and positions[steps] != old_head:
+            steps += 1
+        if steps == len(positions):
+            self.reset(snake, food)
+            return
+
+        grid = snake.body_grid
+        for i in range(steps - 1, -1, -1):
+            self.drawn_body.appendleft(positions[i])
+        # Đuôi đã bỏ đi: xoá những ô không còn thuộc thân rắn
+        while len(self.drawn_body) > len(positions):
+            tail = self.drawn_body.pop()
+            if tail not in grid:
+                self._draw_cell(tail, get_sprite('background'))
+        if steps:
+            body = get_sprite('body', snake.color)
+            for i in range(steps, 0, -1):
+                self._draw_cell(positions[i], body)
+            self._draw_cell(positions[0], get_sprite('head'))
+
+        if food.position != self.drawn_food:
+            if self.drawn_food not in grid:
+                self._draw_cell(self.drawn_food, get_sprite('background'))
+            self._draw_cell(food.position, get_sprite('food'))
+            self.drawn_food = food.position
+
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty.clear()
@@ -0,0 +1,49 @@
+import sys
+import argparse
+from database import Database
+from recording import replay_episode
+from constants import FPS
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded Snake games without running the neural network')
+    parser.add_argument('--session-id', type=int, help='Replay the best recorded game of this session (default: best of all sessions)')
+    parser.add_argument('--episode-id', type=int, help='Replay a specific recorded game')
+    parser.add_argument('--list', action='store_true', help='List recorded games instead of replaying')
+    parser.add_argument('--fps', type=int, default=FPS, help=f'Playback speed in steps per second, 0 = uncapped fast-forward (default: {FPS})')
+    parser.add_argument('--headless', action='store_true', help='Replay without a window and print the result (pygame is not imported)')
+    args = parser.parse_args()
+
+    db = Database()
+
+    if args.list:
+        episodes = db.get_episodes(args.session_id)
+        if not episodes:
+            print("No recorded games found in database.")
+        else:
+            print("\n=== Recorded Games ===")
+            print(f"{'ID':<6} {'Session':<8} {'Gen':<6} {'Fitness':<15} {'Score':<6} {'Steps':<8}")
+            print("-" * 55)
+            for episode_id, session_id, generation, fitness, score, steps in episodes:
+                print(f"{episode_id:<6} {session_id:<8} {generation if generation is not None else '-':<6} {fitness:<15.2f} {score:<6} {steps:<8}")
+            print("\nUse --episode-id <ID> to replay a specific game.")
+        db.close()
+        return
+
+    episode = db.load_episode(args.episode_id, args.session_id)
+    db.close()
+    if not episode:
+        print("No recorded game found. Train with --record-episodes or run demo_saved_model.py --record first.")
+        sys.exit(1)
+
+    print(f"Replaying game with seed {episode.seed} ({len(episode.actions)} actions, recorded score {episode.score})")
+    fitness, score, steps = replay_episode(episode, display=not args.headless, fps=args.fps)
+    print(f"Replay results - Score: {score}, Fitness: {fitness:.2f}, Steps: {steps}")
+    if (score, steps) != (episode.score, episode.steps):
+        print("Warning: the replay does not match the recorded result (the game rules may have changed since it was recorded).")
+
+    if not args.headless:
+        import render
+        render.close_window()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+from functools import lru_cache
+import numpy as np
+from constants import *
+
+# Hướng theo chiều kim đồng hồ, cùng thứ tự với Snake.turn
+DIRECTIONS = [UP, RIGHT, DOWN, LEFT]
+DIRECTION_INDEX = {d: i for i, d in enumerate(DIRECTIONS)}
+
+
+class SensorTables:
+    """Các bảng tra cứu cho cảm biến của rắn trên một bàn cờ cố định.
+
+    Ô được đánh số cell = y * width + x, hướng theo DIRECTIONS. Mọi giá trị ở đây
+    chỉ phụ thuộc (ô, hướng) nên được tính một lần cho mỗi kích thước bàn cờ và dùng
+    chung cho Snake.get_inputs và batch_game. Mỗi bảng có bản NumPy (cho bản vector)
+    và bản list (tra cứu từng phần tử nhanh hơn trong Python thuần).
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        num_cells = width * height
+        wall_norm = max(width, height)
+
+        # (trái, thẳng, phải) so với hướng d
+        relative = [((d - 1) % 4, d, (d + 1) % 4) for d in range(4)]
+
+        # Ô kế bên theo mỗi hướng (-1 nếu ra ngoài tường) và khoảng cách tới tường đã chuẩn hoá
+        neighbours = []
+        wall_inputs = []
+        for cell in range(num_cells):
+            x, y = cell % width, cell // width
+            row_n, row_w = [], []
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                row_n.append(ny * width + nx if 0 <= nx < width and 0 <= ny < height else -1)
+                if dx:
+                    dist = width - 1 - x if dx > 0 else x
+                else:
+                    dist = height - 1 - y if dy > 0 else y
+                row_w.append(dist / wall_norm)
+            neighbours.append(row_n)
+            wall_inputs.append(row_w)
+
+        # Cờ hướng thức ăn (trái, thẳng, phải) theo hướng d và dấu (sx, sy) của vector đầu -> mồi,
+        # chỉ số sx + 1, sy + 1. Tương đương dot(vector mồi, hướng tương đối) > 0.
+        food_flags = [[[tuple(1 if sx * DIRECTIONS[r][0] + sy * DIRECTIONS[r][1] > 0 else 0
+                                for r in relative[d])
+                          for sy in (-1, 0, 1)]
+                         for sx in (-1, 0, 1)]
+                        for d in range(4)]
+
+        self.relative = relative
+        self.neighbours = neighbours
+        self.wall_inputs = wall_inputs
+        self.food_flags = food_flags
+
+        self.relative_array = np.array(relative)
+        self.neighbours_array = np.array(neighbours)
+        self.wall_inputs_array = np.array(wall_inputs)
+        self.food_flags_array = np.array(food_flags)
+        self.cell_x = np.arange(num_cells) % width
+        self.cell_y = np.arange(num_cells) // width
+
+
+@lru_cache(maxsize=None)
+def get_sensor_tables(width=GRID_WIDTH, height=GRID_HEIGHT):
+    return SensorTables(width, height)
@@ -1,12 +1,47 @@
-import pygame
 import random
 import numpy as np
+from collections import deque
 from neural_network import NeuralNetwork
+from grid import OccupancyGrid
+from sensors import DIRECTIONS, DIRECTION_INDEX, get_sensor_tables
 from constants import *
 
+def compute_fitness(steps_taken, score, steps_since_food):
+    # Hàm đánh giá độ tốt của con rắn
+    # Kết hợp điểm số và thời gian sống
+    # Công thức cần tinh chỉnh nhiều!
+    # Ví dụ: Ưu tiên điểm cao hơn
+    fitness = steps_taken + (2**score) + (score**2.1)*500
+    # Phạt nếu chết sớm hoặc không ăn được gì
+    if steps_taken < 10 and score == 0:
+        fitness *= 0.1
+    if score == 0 and steps_since_food > 50: # Phạt nếu loanh quanh lâu mà ko ăn
+         fitness *= 0.5
+    return max(1, fitness) # Đảm bảo fitness không âm
+
+SENSORS = get_sensor_tables(GRID_WIDTH, GRID_HEIGHT)
+
+# Rắn bị loại khi đi quá số bước này mà không ăn được mồi
+MAX_STEPS_WITHOUT_FOOD = GRID_WIDTH * GRID_HEIGHT * 1.5
+# Giá trị steps_since_food ở bước rắn bị loại vì đói
+TIMEOUT_STEPS = int(MAX_STEPS_WITHOUT_FOOD) + 1
+
+# Băm cuộn (mod 2**64) của thân rắn: H = sum (ô_k + 1) * BASE**k, k = 0 ở đầu rắn. Thêm
+# đầu mới là H * BASE + (ô + 1), bỏ đuôi (ở chỉ số k = độ dài còn lại) là trừ (ô + 1) * BASE**k
+BODY_HASH_BASE = 0x100000001B3
+BODY_HASH_MASK = 2**64 - 1
+BODY_HASH_POWERS = [pow(BODY_HASH_BASE, k, 2**64) for k in range(GRID_WIDTH * GRID_HEIGHT + 1)]
+
+def body_hash(positions):
+    # Mã băm của thân rắn (danh sách (x, y) từ đầu tới đuôi)
+    h = 0
+    for x, y in reversed(positions):
+        h = (h * BODY_HASH_BASE + y * GRID_WIDTH + x + 1) & BODY_HASH_MASK
+    return h
+
 class Snake:
-    def __init__(self, brain=None, color=GREEN):
-        self.positions = [(GRID_WIDTH // 2, GRID_HEIGHT // 2)]
+    def __init__(self, brain=None, color=GREEN, copy_brain=True, random_brain=True, policy=None):
+        self.set_positions([(GRID_WIDTH // 2, GRID_HEIGHT // 2)])
         self.direction = random.choice([UP, DOWN, LEFT, RIGHT])
         self.grow = False
         self.alive = True
@@ -17,14 +52,30 @@ class Snake:
 
         # Bộ não AI
         if brain:
-            self.brain = brain.clone() # Mỗi con rắn có bản sao não riêng
-        else:
+            # Mỗi con rắn có bản sao não riêng (copy_brain=False khi não vừa được tạo cho riêng nó)
+            self.brain = brain.clone() if copy_brain else brain
+        elif random_brain:
             # Nếu không có não được cung cấp, tạo não ngẫu nhiên
             self.brain = NeuralNetwork(INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES)
+        else:
+            # Rắn không có não, chỉ đi theo các hành động truyền vào step() (phát lại lượt chơi)
+            self.brain = None
+
+        # Bảng quyết định đã biên dịch (policy_table.PolicyTable): khi có, thay cho feedforward
+        self.policy = policy
 
         # Thuộc tính cho GA
         self.fitness = 0
 
+    def set_positions(self, positions):
+        # Thân rắn: deque từ đầu tới đuôi + lưới chiếm chỗ để kiểm tra va chạm O(1)
+        self.positions = deque(positions)
+        self.body_grid = OccupancyGrid(positions=self.positions)
+        self.body_hash = body_hash(self.positions)
+        # Các trạng thái (thân, hướng) đã gặp kể từ lần ăn cuối. Não là tất định và mồi
+        # đứng yên, nên gặp lại một trạng thái nghĩa là rắn đang đi vòng mãi mãi.
+        self.seen_states = set()
+
     def get_head_position(self):
         return self.positions[0]
 
@@ -32,8 +83,8 @@ class Snake:
         # new_direction_index: 0=Rẽ trái, 1=Đi thẳng, 2=Rẽ phải (so với hướng hiện tại)
         # current_direction: Hướng hiện tại của rắn (UP, DOWN, LEFT, RIGHT)
 
-        directions_list = [UP, RIGHT, DOWN, LEFT] # Theo chiều kim đồng hồ
-        current_index = directions_list.index(current_direction)
+        directions_list = DIRECTIONS # Theo chiều kim đồng hồ
+        current_index = DIRECTION_INDEX[current_direction]
 
         if new_direction_index == 0: # Rẽ trái
             new_idx = (current_index - 1) % 4
@@ -49,19 +100,28 @@ class Snake:
              self.direction = new_dir
 
 
-    def move(self, food_pos, all_snake_bodies):
+    def move(self, food_pos, board=None):
+        if not self.alive:
+            return
+        self.step(self.decide(food_pos, board), food_pos)
+
+    def decide(self, food_pos, board=None):
+        # --- Phần AI quyết định hướng đi ---
+        inputs = self.get_inputs(food_pos, board)
+        if self.policy is not None:
+            return self.policy.decide(inputs) # Tra bảng thay vì chạy mạng nơ-ron
+        outputs = self.brain.feedforward(inputs)
+        return int(np.argmax(outputs)) # Chọn hành động có output cao nhất (0=trái, 1=thẳng, 2=phải)
+
+    def step(self, decision, food_pos):
+        # Thực hiện một hành động đã chọn (từ não hoặc từ bản ghi lượt chơi)
         if not self.alive:
             return
 
         self.steps_taken += 1
         self.steps_since_food += 1
 
-        # --- Phần AI quyết định hướng đi ---
-        inputs = self.get_inputs(food_pos, all_snake_bodies)
-        outputs = self.brain.feedforward(inputs)
-        decision = np.argmax(outputs) # Chọn hành động có output cao nhất
         self.turn(decision, self.direction)
-        # --- Kết thúc phần AI ---
 
         cur_x, cur_y = self.get_head_position()
         dir_x, dir_y = self.direction
@@ -72,33 +132,50 @@ class Snake:
             self.alive = False
             return
 
-        # Kiểm tra va chạm thân
-        if new_head in self.positions[1:]: # Không kiểm tra đầu
+        # Kiểm tra va chạm thân (đầu mới không bao giờ trùng đầu cũ nên tra cả lưới)
+        if new_head in self.body_grid:
             self.alive = False
             return
 
         # Di chuyển
-        self.positions.insert(0, new_head)
+        self.positions.appendleft(new_head)
+        self.body_grid.add(new_head)
+        self.body_hash = (self.body_hash * BODY_HASH_BASE + new_head[1] * GRID_WIDTH + new_head[0] + 1) & BODY_HASH_MASK
 
         # Xử lý ăn mồi
         if new_head == food_pos:
             self.score += 1
             self.grow = True
             self.steps_since_food = 0 # Reset bộ đếm
+            self.seen_states.clear()
             # Có thể thêm phần thưởng lớn cho fitness ở đây
         else:
             # Nếu không lớn lên, bỏ đuôi
             if not self.grow:
-                self.positions.pop()
+                tail = self.positions.pop()
+                self.body_grid.remove(tail)
+                self.body_hash = (self.body_hash - (tail[1] * GRID_WIDTH + tail[0] + 1)
+                                  * BODY_HASH_POWERS[len(self.positions)]) & BODY_HASH_MASK
             else:
                 self.grow = False
 
         # Giới hạn số bước không ăn được mồi để tránh vòng lặp vô hạn
-        if self.steps_since_food > GRID_WIDTH * GRID_HEIGHT * 1.5: # Ngưỡng tùy chỉnh
+        if self.steps_since_food > MAX_STEPS_WITHOUT_FOOD: # Ngưỡng tùy chỉnh
              self.alive = False
+             return
+
+        # Phát hiện vòng lặp: trạng thái lặp lại thì rắn sẽ đi vòng tới khi hết hạn, nên kết
+        # thúc ngay với đúng bộ đếm (và fitness) như khi bị loại vì đói
+        state = (self.body_hash, self.direction, len(self.positions))
+        if state in self.seen_states:
+            self.steps_taken += TIMEOUT_STEPS - self.steps_since_food
+            self.steps_since_food = TIMEOUT_STEPS
+            self.alive = False
+        else:
+            self.seen_states.add(state)
 
 
-    def get_inputs(self, food_pos, all_snake_bodies):
+    def get_inputs(self, food_pos, board=None):
         """
         Hàm quan trọng: Lấy thông tin môi trường làm input cho NN.
         Cần định nghĩa rõ ràng các input này. Ví dụ:
@@ -111,109 +188,53 @@ class Snake:
         7. Hướng thức ăn (so với đầu rắn): Phía sau? (0 hoặc 1)
         8. Có thể thêm: Hướng đuôi? Hoặc khoảng cách tới tường/thân theo các hướng.
         """
-        inputs = [0] * INPUT_NODES # Khởi tạo mảng input
+        tables = SENSORS
         head_x, head_y = self.get_head_position()
         food_x, food_y = food_pos
+        cell = head_y * GRID_WIDTH + head_x
+
+        # Xác định hướng tương đối: Trái, Thẳng, Phải (tra bảng theo hướng hiện tại)
+        current_dir = DIRECTION_INDEX[self.direction]
+        dir_l, dir_s, dir_r = tables.relative[current_dir]
+        neighbours = tables.neighbours[cell]
+
+        # Input 0-2: Nguy hiểm Thẳng / Trái / Phải (tường hoặc thân)
+        # Input 3-5: Thức ăn nghiêng về bên trái / phía trước / bên phải
+        sign_x = (food_x > head_x) - (food_x < head_x)
+        sign_y = (food_y > head_y) - (food_y < head_y)
+        food_l, food_s, food_r = tables.food_flags[current_dir][sign_x + 1][sign_y + 1]
+
+        # Input 6-7: Khoảng cách tới tường phía trước / bên trái (normalized)
+        walls = tables.wall_inputs[cell]
+
+        # Lưới để xét "nguy hiểm": `board` là lưới chung của cả bàn cờ (OccupancyGrid có thân
+        # mọi con rắn, kể cả con này, do người gọi cập nhật mỗi tick); None khi chỉ có một con
+        # rắn thì dùng thân của chính nó. Cả hai đều O(1) mỗi ô.
+        if board is None:
+            occupied = self.body_grid
+        elif isinstance(board, OccupancyGrid):
+            if board.width != GRID_WIDTH or board.height != GRID_HEIGHT:
+                raise ValueError(f"Board is {board.width}x{board.height}, sensors expect {GRID_WIDTH}x{GRID_HEIGHT}")
+            occupied = board
+        else:
+            raise TypeError(f"board must be an OccupancyGrid or None, not {type(board).__name__}")
 
-        # Xác định hướng tương đối: Trái, Thẳng, Phải
-        # Lấy hướng hiện tại
-        current_dir = self.direction
-        # Xác định hướng bên trái và phải của hướng hiện tại
-        if current_dir == UP:
-            dir_l, dir_s, dir_r = LEFT, UP, RIGHT
-        elif current_dir == DOWN:
-            dir_l, dir_s, dir_r = RIGHT, DOWN, LEFT
-        elif current_dir == LEFT:
-            dir_l, dir_s, dir_r = DOWN, LEFT, UP
-        else: # RIGHT
-            dir_l, dir_s, dir_r = UP, RIGHT, DOWN
-
-        # Kiểm tra nguy hiểm (Tường hoặc thân)
-        pos_s = (head_x + dir_s[0], head_y + dir_s[1])
-        pos_l = (head_x + dir_l[0], head_y + dir_l[1])
-        pos_r = (head_x + dir_r[0], head_y + dir_r[1])
-
-        # Input 0: Nguy hiểm Thẳng
-        inputs[0] = 1 if self._is_danger(pos_s, all_snake_bodies) else 0
-        # Input 1: Nguy hiểm Trái
-        inputs[1] = 1 if self._is_danger(pos_l, all_snake_bodies) else 0
-        # Input 2: Nguy hiểm Phải
-        inputs[2] = 1 if self._is_danger(pos_r, all_snake_bodies) else 0
-
-        # Input 3-5: Hướng thức ăn (đơn giản hóa)
-        # So sánh vector từ đầu rắn đến thức ăn với các hướng tương đối
-        vec_food = (food_x - head_x, food_y - head_y)
-
-        # Tính dot product để xem góc tương đối
-        dot_s = vec_food[0]*dir_s[0] + vec_food[1]*dir_s[1]
-        dot_l = vec_food[0]*dir_l[0] + vec_food[1]*dir_l[1]
-        dot_r = vec_food[0]*dir_r[0] + vec_food[1]*dir_r[1]
-
-        inputs[3] = 1 if dot_l > 0 else 0 # Thức ăn nghiêng về bên trái
-        inputs[4] = 1 if dot_s > 0 else 0 # Thức ăn nghiêng về phía trước
-        inputs[5] = 1 if dot_r > 0 else 0 # Thức ăn nghiêng về bên phải
-
-        # Có thể thêm input khác như khoảng cách tới thức ăn, khoảng cách tới tường...
-        # Ví dụ Input 6: Khoảng cách tới tường phía trước (normalized)
-        dist_s = self._distance_to_wall(head_x, head_y, dir_s)
-        inputs[6] = dist_s / max(GRID_WIDTH, GRID_HEIGHT)
-
-        # Ví dụ Input 7: Khoảng cách tới tường bên trái (normalized)
-        dist_l = self._distance_to_wall(head_x, head_y, dir_l)
-        inputs[7] = dist_l / max(GRID_WIDTH, GRID_HEIGHT)
-
-
-        # Đảm bảo trả về đúng số lượng input đã định nghĩa
-        return inputs[:INPUT_NODES]
-
-    def _is_danger(self, pos, all_snake_bodies):
-        x, y = pos
-        # Kiểm tra tường
-        if not (0 <= x < GRID_WIDTH and 0 <= y < GRID_HEIGHT):
-            return True
-        # Kiểm tra va chạm thân (của chính nó hoặc rắn khác nếu có)
-        if pos in self.positions: # Chỉ kiểm tra thân của chính nó cho đơn giản
-             return True
-        # Nâng cao: kiểm tra va chạm với thân của rắn khác
-        # if any(pos in snake_body for snake_body in all_snake_bodies):
-        #     return True
-        return False
-
-    def _distance_to_wall(self, x, y, direction):
-        dist = 0
-        curr_x, curr_y = x, y
-        while True:
-            curr_x += direction[0]
-            curr_y += direction[1]
-            if not (0 <= curr_x < GRID_WIDTH and 0 <= curr_y < GRID_HEIGHT):
-                break
-            dist += 1
-        return dist
+        return [
+            self._is_danger(neighbours[dir_s], occupied),
+            self._is_danger(neighbours[dir_l], occupied),
+            self._is_danger(neighbours[dir_r], occupied),
+            food_l, food_s, food_r,
+            walls[dir_s],
+            walls[dir_l],
+        ]
+
+    def _is_danger(self, cell, occupied):
+        # cell: chỉ số ô (y * GRID_WIDTH + x), -1 nếu nằm ngoài tường
+        if cell < 0:
+            return 1
+        # Kiểm tra va chạm thân (OccupancyGrid, O(1))
+        return 1 if occupied.cells[cell] else 0
 
 
     def calculate_fitness(self):
-        # Hàm đánh giá độ tốt của con rắn
-        # Kết hợp điểm số và thời gian sống
-        # Công thức cần tinh chỉnh nhiều!
-        # Ví dụ: Ưu tiên điểm cao hơn
-        self.fitness = self.steps_taken + (2**self.score) + (self.score**2.1)*500
-        # Phạt nếu chết sớm hoặc không ăn được gì
-        if self.steps_taken < 10 and self.score == 0:
-            self.fitness *= 0.1
-        if self.score == 0 and self.steps_since_food > 50: # Phạt nếu loanh quanh lâu mà ko ăn
-             self.fitness *= 0.5
-        self.fitness = max(1, self.fitness) # Đảm bảo fitness không âm
-
-
-    def draw(self, surface):
-        if not self.alive: return # Không vẽ rắn đã chết
-
-        for i, p in enumerate(self.positions):
-            rect = pygame.Rect(p[0] * GRID_SIZE, p[1] * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-            inner_rect = pygame.Rect(p[0] * GRID_SIZE + 1, p[1] * GRID_SIZE + 1, GRID_SIZE - 2, GRID_SIZE - 2)
-            if i == 0: # Đầu rắn
-                 pygame.draw.rect(surface, (0,100,0) , rect) # Màu đậm hơn cho đầu
-                 pygame.draw.rect(surface, (0,150,0) , inner_rect)
-            else:
-                 pygame.draw.rect(surface, self.color, rect)
-                 pygame.draw.rect(surface, (self.color[0]*0.8, self.color[1]*0.8, self.color[2]*0.8), inner_rect) # Màu trong nhạt hơn
\ No newline at end of file
+        self.fitness = compute_fitness(self.steps_taken, self.score, self.steps_since_food)
@@ -0,0 +1,66 @@
+import json
+import os
+import sqlite3
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from neural_network import NeuralNetwork
+from constants import INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES
+
+# Schema of the first release (user_version 0): weights as JSON text, no blob columns
+LEGACY_SCHEMA = '''
+CREATE TABLE training_sessions (
+    id INTEGER PRIMARY KEY,
+    start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    generations INTEGER,
+    population_size INTEGER,
+    mutation_rate REAL,
+    input_nodes INTEGER,
+    hidden_nodes INTEGER,
+    output_nodes INTEGER,
+    best_fitness REAL,
+    avg_fitness REAL
+);
+CREATE TABLE neural_networks (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER,
+    generation INTEGER,
+    fitness REAL,
+    weights_ih TEXT,
+    weights_ho TEXT,
+    bias_h TEXT,
+    bias_o TEXT,
+    FOREIGN KEY (session_id) REFERENCES training_sessions (id)
+);
+CREATE TABLE generation_stats (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER,
+    generation INTEGER,
+    max_fitness REAL,
+    avg_fitness REAL,
+    FOREIGN KEY (session_id) REFERENCES training_sessions (id)
+);
+'''
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """A database in the first release's schema holding one session with two networks.
+
+    Returns (path, best network), the best network being the one with the higher fitness.
+    """
+    path = str(tmp_path / "legacy.db")
+    networks = [NeuralNetwork(INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES) for _ in range(2)]
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.execute('INSERT INTO training_sessions (population_size, mutation_rate, input_nodes, hidden_nodes, output_nodes) '
+                 'VALUES (?, ?, ?, ?, ?)', (50, 0.1, INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES))
+    for generation, (fitness, network) in enumerate(zip((10.0, 20.0), networks)):
+        conn.execute('INSERT INTO neural_networks (session_id, generation, fitness, weights_ih, weights_ho, bias_h, bias_o) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                     (1, generation, fitness, json.dumps(network.weights_ih.tolist()), json.dumps(network.weights_ho.tolist()),
+                      json.dumps(network.bias_h.tolist()), json.dumps(network.bias_o.tolist())))
+    conn.commit()
+    conn.close()
+    return path, networks[1]
@@ -0,0 +1,38 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from snake import Snake
+from neural_network import NeuralNetwork, PopulationNetwork
+from game import run_simulation
+from batch_game import run_batch_simulation
+from constants import INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES
+
+NUM_SNAKES = 2000
+
+
+def random_brains(count, seed=1):
+    np.random.seed(seed)
+    return [NeuralNetwork(INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES) for _ in range(count)]
+
+
+def test_batch_matches_scalar_simulation():
+    brains = random_brains(NUM_SNAKES)
+    seeds = list(range(NUM_SNAKES))
+    scalar_snakes = [Snake(brain=brain) for brain in brains]
+    expected = [run_simulation(snake, seed=seed) for snake, seed in zip(scalar_snakes, seeds)]
+
+    batch_snakes = [Snake(brain=brain) for brain in brains]
+    assert run_batch_simulation(batch_snakes, seeds) == expected
+    for scalar, batch in zip(scalar_snakes, batch_snakes):
+        assert (batch.score, batch.steps_taken, batch.fitness) == (scalar.score, scalar.steps_taken, scalar.fitness)
+
+
+def test_batch_with_population_network_matches_scalar_simulation():
+    brains = random_brains(NUM_SNAKES, seed=2)
+    seeds = [seed * 7919 for seed in range(NUM_SNAKES)]
+    expected = [run_simulation(Snake(brain=brain), seed=seed) for brain, seed in zip(brains, seeds)]
+
+    population = PopulationNetwork.from_networks(brains)
+    assert run_batch_simulation([Snake(brain=brain) for brain in brains], seeds, brains=population) == expected
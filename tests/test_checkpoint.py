@@ -0,0 +1,32 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from genetic_algorithm import GeneticAlgorithm
+from constants import INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES
+
+
+def make_ga(mutation_rate, **options):
+    return GeneticAlgorithm(60, mutation_rate, INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES,
+                            use_database=False, batched=True, seed=7, **options)
+
+
+def test_resume_continues_the_checkpointed_run_exactly(tmp_path):
+    path = str(tmp_path / "run.ckpt")
+    uninterrupted = make_ga(0.2)
+    for _ in range(4):
+        uninterrupted.run_generation()
+
+    interrupted = make_ga(0.2, checkpoint_path=path, checkpoint_interval=2)
+    for _ in range(2):
+        interrupted.run_generation()
+    # Resumed with another mutation rate: the checkpoint's rate wins
+    resumed = make_ga(0.05, resume_from=path)
+    assert resumed.mutation_rate == 0.2
+    for _ in range(2):
+        resumed.run_generation()
+
+    assert resumed.generation == uninterrupted.generation
+    np.testing.assert_array_equal(resumed.fitness_scores, uninterrupted.fitness_scores)
+    np.testing.assert_array_equal(resumed.genomes, uninterrupted.genomes)
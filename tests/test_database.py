@@ -0,0 +1,47 @@
+import os
+import sqlite3
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from database import Database, load_best_network_readonly
+
+
+def assert_same_network(network, expected):
+    for name in ('weights_ih', 'weights_ho', 'bias_h', 'bias_o'):
+        np.testing.assert_array_equal(getattr(network, name), getattr(expected, name))
+
+
+def user_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_legacy_database_loads_read_only(legacy_db):
+    path, best = legacy_db
+    with open(path, 'rb') as f:
+        before = f.read()
+    assert_same_network(load_best_network_readonly(path), best)
+    assert_same_network(load_best_network_readonly(path, 1), best)
+    assert load_best_network_readonly(path, 2) is None
+    # Read-only loading must not upgrade or otherwise touch the file
+    with open(path, 'rb') as f:
+        assert f.read() == before
+    assert user_version(path) == 0
+
+
+def test_legacy_database_loads_read_write(legacy_db):
+    path, best = legacy_db
+    db = Database(path)
+    try:
+        assert_same_network(db.load_best_neural_network(), best)
+        assert_same_network(db.load_best_neural_network(1), best)
+        # After migrating the JSON rows to blobs the same network comes back
+        assert db.migrate_legacy_networks(vacuum=False) == 2
+        assert_same_network(db.load_best_neural_network(1), best)
+    finally:
+        db.close()
+    assert_same_network(load_best_network_readonly(path), best)
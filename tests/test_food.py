@@ -0,0 +1,17 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from food import Food
+from grid import OccupancyGrid
+from constants import GRID_WIDTH, GRID_HEIGHT
+
+
+def test_food_on_a_larger_grid_lands_on_a_free_cell_of_that_grid():
+    width, height = GRID_WIDTH + 7, GRID_HEIGHT + 3
+    # Only the last cell of the larger grid is free
+    grid = OccupancyGrid(width, height, positions=[(x, y) for y in range(height) for x in range(width)][:-1])
+    food = Food(rng=random.Random(0))
+    food.randomize_position(grid)
+    assert food.position == (width - 1, height - 1)
@@ -0,0 +1,57 @@
+import asyncio
+import json
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from inference_server import InferenceServer, ModelCache
+from policy_table import policy_inputs
+from constants import GRID_WIDTH, GRID_HEIGHT
+
+
+async def ask(db_name, requests):
+    server = InferenceServer(ModelCache(db_name))
+    await server.start('127.0.0.1', 0)
+    port = server.server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(''.join(json.dumps(request) + '\n' for request in requests).encode())
+        await writer.drain()
+        responses = [json.loads(await asyncio.wait_for(reader.readline(), 10)) for _ in requests]
+        writer.close()
+        await writer.wait_closed()
+        return {response['id']: response for response in responses}
+    finally:
+        server.server.close()
+        await server.server.wait_closed()
+
+
+def test_serves_actions_from_legacy_database(legacy_db):
+    path, best = legacy_db
+    with open(path, 'rb') as f:
+        before = f.read()
+    inputs = policy_inputs(max(GRID_WIDTH, GRID_HEIGHT))[::97]
+    requests = [{'id': i, 'session_id': 1 if i % 2 else None, 'inputs': x.tolist()} for i, x in enumerate(inputs)]
+    responses = asyncio.run(ask(path, requests))
+    for i, x in enumerate(inputs):
+        assert responses[i] == {'id': i, 'action': int(np.argmax(best.feedforward(x)))}
+    with open(path, 'rb') as f:
+        assert f.read() == before
+
+
+def test_bad_requests_get_an_error_line(legacy_db, tmp_path):
+    path, _ = legacy_db
+    zeros = [0] * 8
+    responses = asyncio.run(ask(path, [
+        {'id': 'list', 'session_id': [1], 'inputs': zeros},
+        {'id': 'bool', 'session_id': True, 'inputs': zeros},
+        {'id': 'unknown', 'session_id': 99, 'inputs': zeros},
+        {'id': 'short', 'session_id': 1, 'inputs': [0, 1]},
+    ]))
+    assert all('error' in response for response in responses.values())
+
+    missing = str(tmp_path / 'missing.db')
+    responses = asyncio.run(ask(missing, [{'id': 1, 'inputs': zeros}]))
+    assert 'error' in responses[1]
+    assert not os.path.exists(missing)
@@ -0,0 +1,47 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from neural_network import NeuralNetwork, PopulationNetwork, TIE_MARGIN
+from constants import INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES
+
+
+def near_tie_networks(count):
+    # Outputs 0 and 1 differ only by a tiny bias, so the top two are within TIE_MARGIN
+    networks = []
+    for _ in range(count):
+        network = NeuralNetwork(INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES)
+        network.weights_ho[1] = network.weights_ho[0]
+        network.bias_o[1] = network.bias_o[0] + np.float32(1e-7)
+        network.weights_ho[2] = -10
+        networks.append(network)
+    return networks
+
+
+def test_population_decide_matches_scalar_feedforward_on_near_ties(monkeypatch):
+    np.random.seed(3)
+    networks = near_tie_networks(200)
+    population = PopulationNetwork.from_networks(networks)
+    rows = np.sort(np.random.choice(len(networks), 150, replace=False))
+    inputs = np.random.rand(len(rows), INPUT_NODES)
+
+    outputs = population.feedforward(inputs, rows)
+    top2 = np.sort(outputs, axis=1)[:, -2:]
+    assert (top2[:, 1] - top2[:, 0] < TIE_MARGIN).all()
+
+    expected = [np.argmax(networks[row].feedforward(x)) for row, x in zip(rows, inputs)]
+    # Another BLAS may round the batched products differently: push the batched outputs
+    # toward the scalar loser by less than TIE_MARGIN, decide must still agree with feedforward
+    feedforward = PopulationNetwork.feedforward
+
+    def rounded_differently(self, inputs, rows=None):
+        outputs = feedforward(self, inputs, rows)
+        losers = 1 - np.argmax(outputs[:, :2], axis=1)
+        outputs[np.arange(len(outputs)), losers] += TIE_MARGIN / 2
+        return outputs
+
+    monkeypatch.setattr(PopulationNetwork, 'feedforward', rounded_differently)
+    assert population.decide(inputs, rows).tolist() == expected
+    everyone = np.random.rand(len(networks), INPUT_NODES)
+    assert population.decide(everyone).tolist() == [np.argmax(n.feedforward(x)) for n, x in zip(networks, everyone)]
@@ -0,0 +1,84 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import numpy as np
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from genetic_algorithm import GeneticAlgorithm
+from constants import INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES, MUTATION_RATE
+
+POPULATION_SIZE = 200
+SEED = 5
+
+
+@pytest.fixture
+def workers():
+    """Two eval_worker.py processes on 127.0.0.1, each on an ephemeral port."""
+    processes, addresses = [], []
+    try:
+        for _ in range(2):
+            process = subprocess.Popen([sys.executable, "-u", os.path.join(ROOT, "eval_worker.py"),
+                                        "--host", "127.0.0.1", "--port", "0"],
+                                       stdout=subprocess.PIPE, text=True)
+            processes.append(process)
+            # "Evaluation worker listening on 127.0.0.1:<port>"
+            addresses.append(process.stdout.readline().split()[-1])
+        yield addresses, processes
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+            process.stdout.close()
+
+
+def make_ga(**options):
+    return GeneticAlgorithm(POPULATION_SIZE, MUTATION_RATE, INPUT_NODES, HIDDEN_NODES, OUTPUT_NODES,
+                            use_database=False, seed=SEED, **options)
+
+
+def serial_fitness(generations):
+    ga = make_ga()
+    scores = []
+    for _ in range(generations):
+        ga.run_generation()
+        scores.append(ga.fitness_scores.copy())
+    return scores
+
+
+def test_remote_generation_matches_serial(workers):
+    addresses, _ = workers
+    expected = serial_fitness(2)
+    ga = make_ga(remote_workers=addresses)
+    try:
+        for scores in expected:
+            ga.run_generation()
+            np.testing.assert_array_equal(ga.fitness_scores, scores)
+    finally:
+        ga.close_workers()
+
+
+def test_killed_worker_batches_are_redispatched(workers):
+    addresses, processes = workers
+    expected = serial_fitness(2)
+    ga = make_ga(remote_workers=addresses)
+    try:
+        ga.run_generation() # Connects to both workers
+        np.testing.assert_array_equal(ga.fitness_scores, expected[0])
+        ga.remote_evaluator.batch_size = 10 # Enough batches that both workers get some
+
+        # The second worker accepts batches but never answers, then dies mid-generation
+        os.kill(processes[1].pid, signal.SIGSTOP)
+        killer = threading.Timer(0.2, processes[1].kill)
+        killer.start()
+        try:
+            ga.run_generation()
+        finally:
+            killer.cancel()
+        np.testing.assert_array_equal(ga.fitness_scores, expected[1])
+        assert ga.remote_evaluator.redispatched > 0
+    finally:
+        ga.close_workers()
@@ -0,0 +1,34 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from snake import Snake
+from grid import OccupancyGrid
+from constants import UP, GRID_WIDTH, GRID_HEIGHT
+
+
+def snake_heading_up():
+    snake = Snake(random_brain=False)
+    snake.set_positions([(10, 10), (10, 11)])
+    snake.direction = UP
+    return snake
+
+
+def test_danger_uses_own_body_without_board():
+    snake = snake_heading_up()
+    assert snake.get_inputs((0, 0))[:3] == [0, 0, 0]
+
+
+def test_danger_sees_other_snakes_on_shared_board():
+    snake = snake_heading_up()
+    board = OccupancyGrid(positions=list(snake.positions) + [(10, 9), (9, 10)]) # Another snake ahead and to the left
+    assert snake.get_inputs((0, 0), board)[:3] == [1, 1, 0]
+
+
+def test_board_must_be_an_occupancy_grid_of_the_sensor_size():
+    snake = snake_heading_up()
+    with pytest.raises(TypeError):
+        snake.get_inputs((0, 0), [snake.positions])
+    with pytest.raises(ValueError):
+        snake.get_inputs((0, 0), OccupancyGrid(GRID_WIDTH + 1, GRID_HEIGHT))
@@ -0,0 +1,22 @@
+import time
+from contextlib import contextmanager
+
+class PhaseTimer:
+    """Đo thời gian (giây) của từng giai đoạn trong một thế hệ.
+
+    Dùng `with timer.phase('evaluation'): ...`; cùng một tên được cộng dồn nếu gọi
+    nhiều lần. reset() ở đầu mỗi thế hệ.
+    """
+    def __init__(self):
+        self.seconds = {}
+
+    def reset(self):
+        self.seconds = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
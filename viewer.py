@@ -0,0 +1,99 @@
+import multiprocessing
+import queue
+from constants import *
+
+class Viewer:
+    """Hiển thị con rắn tốt nhất trong một tiến trình riêng.
+
+    Huấn luyện chỉ gửi bộ gen mới nhất qua một hàng đợi một phần tử (show() không
+    bao giờ chờ): nếu tiến trình hiển thị chưa lấy bộ gen trước đó thì bộ gen cũ bị
+    bỏ. Tiến trình hiển thị chơi liên tục với bộ não hiện có ở FPS của game và chỉ
+    đổi sang bộ não mới khi ván đang chơi kết thúc.
+    """
+    def __init__(self, input_nodes, hidden_nodes, output_nodes):
+        self.layer_sizes = (input_nodes, hidden_nodes, output_nodes)
+        self.queue = multiprocessing.Queue(maxsize=1)
+        self.stop_event = multiprocessing.Event()
+        self.closed_event = multiprocessing.Event() # Người dùng đã đóng cửa sổ
+        self.process = None
+
+    def show(self, genome, generation, fitness):
+        """Gửi bộ gen mới nhất cho tiến trình hiển thị (khởi động nó ở lần gọi đầu tiên)."""
+        if self.process is None:
+            self.process = multiprocessing.Process(
+                target=_viewer_main,
+                args=(self.queue, self.stop_event, self.closed_event, self.layer_sizes),
+                name="snake-viewer", daemon=True)
+            self.process.start()
+        item = (genome.copy(), generation, fitness)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # Bỏ bộ gen cũ chưa được hiển thị, chỉ giữ bộ gen mới nhất
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                pass
+
+    def closed(self):
+        """True nếu người dùng đã đóng cửa sổ hiển thị."""
+        return self.closed_event.is_set()
+
+    def close(self, timeout=2.0):
+        if self.process is None:
+            return
+        self.stop_event.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.process = None
+        # Không chờ flush dữ liệu còn trong hàng đợi khi thoát
+        self.queue.cancel_join_thread()
+
+
+def _viewer_main(brain_queue, stop_event, closed_event, layer_sizes):
+    # Chạy trong tiến trình hiển thị: chỉ tiến trình này nạp pygame
+    import pygame
+    import render
+    from game import start_episode
+    from neural_network import NeuralNetwork
+    from snake import Snake
+
+    screen = render.open_window('Snake AI - waiting for the first generation')
+    renderer = render.BoardRenderer(screen)
+    clock = pygame.time.Clock()
+    brain = None
+    snake = food = None
+
+    while not stop_event.is_set():
+        if render.quit_requested():
+            closed_event.set()
+            break
+
+        if snake is None or not snake.alive:
+            # Ván mới: lấy bộ não mới nhất nếu có, nếu không chơi lại bộ não hiện tại
+            try:
+                genome, generation, fitness = brain_queue.get(block=brain is None, timeout=0.1)
+                brain = NeuralNetwork.from_genome(genome, *layer_sizes)
+                pygame.display.set_caption(f'Snake AI - best of generation {generation} (fitness {fitness:.2f})')
+            except queue.Empty:
+                if brain is None:
+                    continue
+            snake = Snake(brain=brain)
+            food = start_episode(snake)
+            renderer.reset(snake, food)
+
+        snake.move(food.position)
+        if snake.get_head_position() == food.position:
+            food.randomize_position(snake.body_grid)
+
+        if snake.alive:
+            renderer.update(snake, food)
+        clock.tick(FPS)
+
+    render.close_window()